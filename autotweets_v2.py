@@ -1,655 +1,3375 @@
-import os
-import time
-import random
-import pandas as pd
-import schedule
-import requests
-import base64
-import json
-from datetime import datetime
-import telebot
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# Twitter API credentials from .env file
-TWITTER_API_KEY = os.getenv("TWITTER_API_KEY")
-TWITTER_API_SECRET = os.getenv("TWITTER_API_SECRET")
-TWITTER_ACCESS_TOKEN = os.getenv("TWITTER_ACCESS_TOKEN")
-TWITTER_ACCESS_SECRET = os.getenv("TWITTER_ACCESS_SECRET")
-TWITTER_BEARER_TOKEN = os.getenv("TWITTER_BEARER_TOKEN")
-
-# Telegram Bot credentials
-TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
-
-# Configuration - easily change the number of posts per day (between 4-10)
-POSTS_PER_DAY = 4  # Default: 4 posts per day
-
-# Initialize Telegram bot
-def init_telegram_bot():
-    if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
-        return telebot.TeleBot(TELEGRAM_BOT_TOKEN)
-    return None
-
-bot = init_telegram_bot()
-
-# Function to send message to Telegram
-def send_telegram_message(message):
-    try:
-        if bot and TELEGRAM_CHAT_ID:
-            bot.send_message(TELEGRAM_CHAT_ID, message)
-            print(f"📱 Telegram message sent: {message}")
-    except Exception as e:
-        print(f"❌ Telegram error: {e}")
-
-# Custom print function that also sends to Telegram
-def log_message(message):
-    print(message)
-    send_telegram_message(message)
-
-# Function to create OAuth 1.0a headers for Twitter API v2
-def get_oauth_headers(method="GET", url="", params=None):
-    import hmac
-    import hashlib
-    import urllib.parse
-    import uuid
-    import time
-    
-    # Generate OAuth parameters
-    oauth_timestamp = str(int(time.time()))
-    oauth_nonce = uuid.uuid4().hex
-    
-    # Base OAuth parameters
-    oauth_params = {
-        'oauth_consumer_key': TWITTER_API_KEY,
-        'oauth_nonce': oauth_nonce,
-        'oauth_signature_method': 'HMAC-SHA1',
-        'oauth_timestamp': oauth_timestamp,
-        'oauth_token': TWITTER_ACCESS_TOKEN,
-        'oauth_version': '1.0'
-    }
-    
-    # Combine OAuth parameters with any additional parameters
-    all_params = {}
-    all_params.update(oauth_params)
-    if params:
-        all_params.update(params)
-    
-    # Create signature base string
-    base_string_params = '&'.join([f"{urllib.parse.quote(k)}={urllib.parse.quote(str(all_params[k]))}" for k in sorted(all_params.keys())])
-    base_string = f"{method}&{urllib.parse.quote(url)}&{urllib.parse.quote(base_string_params)}"
-    
-    # Create signing key
-    signing_key = f"{urllib.parse.quote(TWITTER_API_SECRET)}&{urllib.parse.quote(TWITTER_ACCESS_SECRET)}"
-    
-    # Create signature
-    signature = base64.b64encode(hmac.new(signing_key.encode(), base_string.encode(), hashlib.sha1).digest()).decode()
-    
-    # Add signature to OAuth parameters
-    oauth_params['oauth_signature'] = signature
-    
-    # Create Authorization header
-    auth_header = 'OAuth ' + ', '.join([f'{urllib.parse.quote(k)}="{urllib.parse.quote(oauth_params[k])}"' for k in sorted(oauth_params.keys())])
-    
-    return {
-        'Authorization': auth_header,
-        'Content-Type': 'application/json'
-    }
-
-# Function to upload media to Twitter
-def upload_media(media_path):
-    log_message(f"🔄 Uploading media: {media_path}")
-    
-    try:
-        # Step 1: INIT - Initialize the upload
-        with open(media_path, 'rb') as file:
-            media_data = file.read()
-        
-        file_size = len(media_data)
-        media_type = "image/jpeg" if media_path.endswith(('.jpg', '.jpeg')) else "image/png" if media_path.endswith('.png') else "video/mp4"
-        
-        # For Twitter API v1.1 media upload (still used for media)
-        url = "https://upload.twitter.com/1.1/media/upload.json"
-        
-        # Create OAuth 1.0a signature
-        import hmac
-        import hashlib
-        import urllib.parse
-        import uuid
-        import time
-        
-        # Generate OAuth parameters
-        oauth_timestamp = str(int(time.time()))
-        oauth_nonce = uuid.uuid4().hex
-        
-        # Base string parameters
-        params = {
-            'oauth_consumer_key': TWITTER_API_KEY,
-            'oauth_nonce': oauth_nonce,
-            'oauth_signature_method': 'HMAC-SHA1',
-            'oauth_timestamp': oauth_timestamp,
-            'oauth_token': TWITTER_ACCESS_TOKEN,
-            'oauth_version': '1.0',
-            'command': 'INIT',
-            'total_bytes': str(file_size),
-            'media_type': media_type
-        }
-        
-        # Create signature base string
-        base_string_params = '&'.join([f"{urllib.parse.quote(k)}={urllib.parse.quote(params[k])}" for k in sorted(params.keys())])
-        base_string = f"POST&{urllib.parse.quote(url)}&{urllib.parse.quote(base_string_params)}"
-        
-        # Create signing key
-        signing_key = f"{urllib.parse.quote(TWITTER_API_SECRET)}&{urllib.parse.quote(TWITTER_ACCESS_SECRET)}"
-        
-        # Create signature
-        signature = base64.b64encode(hmac.new(signing_key.encode(), base_string.encode(), hashlib.sha1).digest()).decode()
-        
-        # Add signature to parameters
-        params['oauth_signature'] = signature
-        
-        # Create Authorization header
-        auth_header = 'OAuth ' + ', '.join([f'{urllib.parse.quote(k)}="{urllib.parse.quote(params[k])}"' for k in sorted(params.keys()) if k.startswith('oauth')])
-        
-        # Headers for the request
-        headers = {
-            'Authorization': auth_header,
-            'Content-Type': 'application/x-www-form-urlencoded'
-        }
-        
-        # Data for INIT
-        data = {
-            'command': 'INIT',
-            'total_bytes': str(file_size),
-            'media_type': media_type
-        }
-        
-        # Make INIT request
-        response = requests.post(url, headers=headers, data=data)
-        
-        if response.status_code != 200:
-            log_message(f"❌ Media upload INIT failed: {response.text}")
-            return None
-        
-        media_id = response.json()['media_id_string']
-        log_message(f"✅ Media upload INIT successful. Media ID: {media_id}")
-        
-        # Step 2: APPEND - Upload the media data in chunks
-        chunk_size = 4 * 1024 * 1024  # 4MB chunks
-        
-        for i in range(0, file_size, chunk_size):
-            chunk = media_data[i:i+chunk_size]
-            
-            # Update OAuth parameters for APPEND
-            oauth_timestamp = str(int(time.time()))
-            oauth_nonce = uuid.uuid4().hex
-            
-            params = {
-                'oauth_consumer_key': TWITTER_API_KEY,
-                'oauth_nonce': oauth_nonce,
-                'oauth_signature_method': 'HMAC-SHA1',
-                'oauth_timestamp': oauth_timestamp,
-                'oauth_token': TWITTER_ACCESS_TOKEN,
-                'oauth_version': '1.0',
-                'command': 'APPEND',
-                'media_id': media_id,
-                'segment_index': str(i // chunk_size)
-            }
-            
-            # Create signature base string for APPEND
-            base_string_params = '&'.join([f"{urllib.parse.quote(k)}={urllib.parse.quote(params[k])}" for k in sorted(params.keys())])
-            base_string = f"POST&{urllib.parse.quote(url)}&{urllib.parse.quote(base_string_params)}"
-            
-            # Create signature for APPEND
-            signature = base64.b64encode(hmac.new(signing_key.encode(), base_string.encode(), hashlib.sha1).digest()).decode()
-            
-            # Add signature to parameters
-            params['oauth_signature'] = signature
-            
-            # Create Authorization header for APPEND
-            auth_header = 'OAuth ' + ', '.join([f'{urllib.parse.quote(k)}="{urllib.parse.quote(params[k])}"' for k in sorted(params.keys()) if k.startswith('oauth')])
-            
-            # Headers for APPEND
-            headers = {
-                'Authorization': auth_header
-            }
-            
-            # Create multipart form data
-            import io
-            from requests_toolbelt.multipart.encoder import MultipartEncoder
-            
-            mp_encoder = MultipartEncoder(
-                fields={
-                    'command': 'APPEND',
-                    'media_id': media_id,
-                    'segment_index': str(i // chunk_size),
-                    'media': ('media', io.BytesIO(chunk), media_type)
-                }
-            )
-            
-            headers['Content-Type'] = mp_encoder.content_type
-            
-            # Make APPEND request
-            response = requests.post(url, headers=headers, data=mp_encoder)
-            
-            if response.status_code != 200:
-                log_message(f"❌ Media upload APPEND failed for segment {i // chunk_size}: {response.text}")
-                return None
-            
-            log_message(f"✅ Media upload APPEND successful for segment {i // chunk_size}")
-        
-        # Step 3: FINALIZE - Finalize the upload
-        oauth_timestamp = str(int(time.time()))
-        oauth_nonce = uuid.uuid4().hex
-        
-        params = {
-            'oauth_consumer_key': TWITTER_API_KEY,
-            'oauth_nonce': oauth_nonce,
-            'oauth_signature_method': 'HMAC-SHA1',
-            'oauth_timestamp': oauth_timestamp,
-            'oauth_token': TWITTER_ACCESS_TOKEN,
-            'oauth_version': '1.0',
-            'command': 'FINALIZE',
-            'media_id': media_id
-        }
-        
-        # Create signature base string for FINALIZE
-        base_string_params = '&'.join([f"{urllib.parse.quote(k)}={urllib.parse.quote(params[k])}" for k in sorted(params.keys())])
-        base_string = f"POST&{urllib.parse.quote(url)}&{urllib.parse.quote(base_string_params)}"
-        
-        # Create signature for FINALIZE
-        signature = base64.b64encode(hmac.new(signing_key.encode(), base_string.encode(), hashlib.sha1).digest()).decode()
-        
-        # Add signature to parameters
-        params['oauth_signature'] = signature
-        
-        # Create Authorization header for FINALIZE
-        auth_header = 'OAuth ' + ', '.join([f'{urllib.parse.quote(k)}="{urllib.parse.quote(params[k])}"' for k in sorted(params.keys()) if k.startswith('oauth')])
-        
-        # Headers for FINALIZE
-        headers = {
-            'Authorization': auth_header,
-            'Content-Type': 'application/x-www-form-urlencoded'
-        }
-        
-        # Data for FINALIZE
-        data = {
-            'command': 'FINALIZE',
-            'media_id': media_id
-        }
-        
-        # Make FINALIZE request
-        response = requests.post(url, headers=headers, data=data)
-        
-        if response.status_code != 200:
-            log_message(f"❌ Media upload FINALIZE failed: {response.text}")
-            return None
-        
-        log_message(f"✅ Media upload FINALIZE successful")
-        
-        # If it's a video, we need to check processing status
-        if media_type.startswith('video'):
-            processing_info = response.json().get('processing_info')
-            if processing_info:
-                state = processing_info.get('state')
-                
-                # If the video is still processing, we need to wait and check status
-                while state == 'pending' or state == 'in_progress':
-                    check_after_secs = processing_info.get('check_after_secs', 5)
-                    log_message(f"🔄 Video processing in progress. Checking again in {check_after_secs} seconds...")
-                    time.sleep(check_after_secs)
-                    
-                    # Update OAuth parameters for STATUS
-                    oauth_timestamp = str(int(time.time()))
-                    oauth_nonce = uuid.uuid4().hex
-                    
-                    params = {
-                        'oauth_consumer_key': TWITTER_API_KEY,
-                        'oauth_nonce': oauth_nonce,
-                        'oauth_signature_method': 'HMAC-SHA1',
-                        'oauth_timestamp': oauth_timestamp,
-                        'oauth_token': TWITTER_ACCESS_TOKEN,
-                        'oauth_version': '1.0',
-                        'command': 'STATUS',
-                        'media_id': media_id
-                    }
-                    
-                    # Create signature base string for STATUS
-                    base_string_params = '&'.join([f"{urllib.parse.quote(k)}={urllib.parse.quote(params[k])}" for k in sorted(params.keys())])
-                    base_string = f"GET&{urllib.parse.quote(url)}&{urllib.parse.quote(base_string_params)}"
-                    
-                    # Create signature for STATUS
-                    signature = base64.b64encode(hmac.new(signing_key.encode(), base_string.encode(), hashlib.sha1).digest()).decode()
-                    
-                    # Add signature to parameters
-                    params['oauth_signature'] = signature
-                    
-                    # Create Authorization header for STATUS
-                    auth_header = 'OAuth ' + ', '.join([f'{urllib.parse.quote(k)}="{urllib.parse.quote(params[k])}"' for k in sorted(params.keys()) if k.startswith('oauth')])
-                    
-                    # Headers for STATUS
-                    headers = {
-                        'Authorization': auth_header
-                    }
-                    
-                    # Make STATUS request
-                    response = requests.get(f"{url}?command=STATUS&media_id={media_id}", headers=headers)
-                    
-                    if response.status_code != 200:
-                        log_message(f"❌ Media upload STATUS check failed: {response.text}")
-                        return None
-                    
-                    processing_info = response.json().get('processing_info')
-                    if not processing_info:
-                        break
-                    
-                    state = processing_info.get('state')
-                    
-                    if state == 'failed':
-                        error = processing_info.get('error')
-                        log_message(f"❌ Video processing failed: {error}")
-                        return None
-                
-                log_message("✅ Video processing completed successfully")
-        
-        return media_id
-        
-    except Exception as e:
-        log_message(f"❌ Media upload error: {str(e)}")
-        return None
-
-# Function to post a tweet with the Twitter API v2
-def post_tweet_v2(text, media_id=None):
-    try:
-        url = "https://api.twitter.com/2/tweets"
-        
-        payload = {"text": text}
-        
-        # Add media if provided
-        if media_id:
-            payload["media"] = {"media_ids": [media_id]}
-        
-        # Create OAuth 1.0a headers
-        headers = get_oauth_headers("POST", url)
-        
-        response = requests.post(url, json=payload, headers=headers)
-        
-        if response.status_code != 201:
-            log_message(f"❌ Tweet posting failed: {response.status_code} - {response.text}")
-            return None
-        
-        return response.json()
-    
-    except Exception as e:
-        log_message(f"❌ Tweet posting error: {str(e)}")
-        return None
-
-# Function to load tweets from Excel file
-def load_tweets_from_excel():
-    try:
-        # Check if the Excel file exists
-        if not os.path.exists("tweetlist.xlsx"):
-            log_message("⚠️ ERROR: 'tweetlist.xlsx' file not found. Please create it with your tweets.")
-            return None, 0
-        
-        # Read the Excel file
-        df = pd.read_excel("tweetlist.xlsx")
-        
-        # Check if the dataframe has the required column
-        if 'Tweet' not in df.columns:
-            log_message("⚠️ ERROR: 'tweetlist.xlsx' must have a 'Tweet' column.")
-            return None, 0
-        
-        # Get tweets and find the first blank row
-        tweets = df['Tweet'].tolist()
-        
-        # Find the first blank row (None or NaN)
-        first_blank = None
-        for i, tweet in enumerate(tweets):
-            if pd.isna(tweet) or tweet == "":
-                first_blank = i
-                break
-        
-        if first_blank is None:
-            first_blank = len(tweets)
-            
-        # Return only non-blank tweets
-        return tweets[:first_blank], first_blank
-        
-    except Exception as e:
-        log_message(f"❌ Error loading tweets from Excel: {e}")
-        return None, 0
-
-# Track current position in tweet list
-current_tweet_index = 0
-total_tweets = 0
-
-# ✅ List of influencers (Twitter handles without '@')
-influencers = [
-    "Edutopia", "TeachThought", "ClassTechTips", "web20classroom", "ShakeUpLearning", "rmbyrne", "ShellTerrell", "gcouros", "coolcatteacher", "MsMagiera", "courosa", "tvanderark", "audreywatters", "lesliefisher", "mrkempnz", "DNLee5", "eveewing", "thesiswhisperer", "AmyJoMartin", "GRwabigwi", "BiscottiNicole", "cultofpedagogy", "Larryferlazzo", "cpappas", "lauraoverton", "DonaldHTaylor", "CatMoore", "Josh_Bersin", "emasie", "brewerhm", "burgessdave", "BethHouf", "JayBilly2", "drmaryhemphill", "ERobbPrincipal", "shfarnsworth", "joboaler", "EduColorMVMT", "douglemov", "Tcea", "EdSurge", "ISTE", "MindShiftKQED", "HollyClarkEdu", "alicekeeler", "tonyvincent", "mattmiller", "jmattmiller", "jeffudall", "curriki"
-
-]
-
-# ✅ Path to the folder containing images/videos
-media_folder = "media"
-
-# ✅ Ensure media folder exists
-if not os.path.exists(media_folder):
-    os.makedirs(media_folder)
-    log_message("📂 'media' folder created. Add media files and rerun the script.")
-    exit()
-
-# ✅ Get list of media files
-media_files = [f for f in os.listdir(media_folder) if f.endswith(('.jpg', '.png', '.mp4', '.mov'))]
-
-# ✅ Ensure there are at least 4 media files
-if len(media_files) < 4:
-    log_message("⚠️ ERROR: Please add at least 4 media files to the 'media' folder before running the script.")
-    exit()
-
-# Function to post a single tweet
-def post_tweet():
-    global current_tweet_index, total_tweets
-    
-    # Reload tweets from Excel to check for updates
-    if current_tweet_index == 0 or current_tweet_index >= total_tweets:
-        tweets_list, tweet_count = load_tweets_from_excel()
-        if not tweets_list or tweet_count == 0:
-            log_message("⚠️ No tweets found in the Excel file or reached the end. Stopping.")
-            return False
-        total_tweets = tweet_count
-        log_message(f"📊 Loaded {total_tweets} tweets from Excel file.")
-    
-    try:
-        # Select tweet and media file based on the index
-        tweet_content = tweets_list[current_tweet_index % total_tweets]
-        media_index = current_tweet_index % len(media_files)
-        media_path = os.path.join(media_folder, media_files[media_index])
-        
-        # Select 10 influencers and format as mentions
-        start_index = (current_tweet_index * 10) % len(influencers)
-        selected_influencers = influencers[start_index:start_index + 10]
-        if len(selected_influencers) < 10:
-            selected_influencers += influencers[:(10 - len(selected_influencers))]
-        
-        # Clean up any @ symbols that might be in the list
-        selected_influencers = [user.replace('@', '') for user in selected_influencers]
-        influencer_tags = " ".join([f"@{user}" for user in selected_influencers])
-
-        # Ensure total tweet length does not exceed 280 characters
-        final_tweet = f"{tweet_content}\n\n{influencer_tags}"
-        if len(final_tweet) > 280:
-            final_tweet = f"{tweet_content[:260]}...\n{influencer_tags}"  # Truncate tweet if needed
-
-        # Upload media
-        log_message(f"🔄 Preparing to post tweet {current_tweet_index+1}/{total_tweets}")
-        media_id = upload_media(media_path)
-        
-        if not media_id:
-            log_message("❌ Failed to upload media. Skipping this tweet.")
-            current_tweet_index += 1
-            return False
-        
-        # Post tweet with media
-        response = post_tweet_v2(final_tweet, media_id)
-        
-        if not response:
-            log_message("❌ Failed to post tweet. Skipping to next tweet.")
-            current_tweet_index += 1
-            return False
-        
-        tweet_id = response.get('data', {}).get('id')
-        
-        if tweet_id:
-            log_message(f"✅ Tweet {current_tweet_index+1}/{total_tweets} posted: {final_tweet}")
-            log_message(f"🔗 Tweet Link: https://twitter.com/user/status/{tweet_id}")
-        else:
-            log_message(f"⚠️ Tweet posted but couldn't get tweet ID. Response: {response}")
-        
-        # Increment tweet index
-        current_tweet_index += 1
-        
-        # Check if we've reached the end of the tweet list
-        if current_tweet_index >= total_tweets:
-            log_message("🎉 Reached the end of the tweet list! Will check for updates tomorrow.")
-            
-        return True
-
-    except Exception as e:
-        log_message(f"❌ Unexpected error while posting tweet: {str(e)}")
-        
-        # Try to provide more detailed diagnostics
-        if "403" in str(e):
-            log_message("🔍 403 Forbidden Error Diagnostics:")
-            log_message("  - This usually indicates an authentication or permission issue")
-            log_message("  - Possible causes:")
-            log_message("    1. Invalid or expired API keys/tokens")
-            log_message("    2. Your app may not have Write permissions enabled")
-            log_message("    3. You might be trying to post duplicate content")
-            log_message("    4. Your account may have posting restrictions")
-            log_message("  - Troubleshooting steps:")
-            log_message("    1. Verify your API keys in the .env file")
-            log_message("    2. Check your Twitter Developer Portal to ensure Write permissions are enabled")
-            log_message("    3. Try posting with different content")
-            
-            # Try to verify API credentials
-            try:
-                log_message("🔄 Attempting to verify API credentials...")
-                url = "https://api.twitter.com/2/users/me"
-                headers = get_oauth_headers("GET", url)
-                response = requests.get(url, headers=headers)
-                
-                if response.status_code == 200:
-                    user_data = response.json().get('data', {})
-                    log_message(f"✅ API connection successful. Authenticated as: @{user_data.get('username')}")
-                    log_message("❗ This suggests the issue is with the content or posting permissions, not the API keys")
-                else:
-                    log_message(f"❌ API verification failed: {response.status_code} - {response.text}")
-                    log_message("❗ This suggests your API keys may be invalid or expired")
-            except Exception as verify_error:
-                log_message(f"❌ API verification failed: {str(verify_error)}")
-                log_message("❗ This suggests your API keys may be invalid or expired")
-        
-        return False
-
-# Optimal posting times in UTC for USA audiences
-optimal_times = [
-    "13:30", "14:30",  # Morning in Eastern US (9:30-10:30 AM ET)
-    "17:00", "18:00",  # Lunch time in Eastern US (1-2 PM ET)
-    "23:00", "00:00",  # Evening in Eastern US (7-8 PM ET)
-    "02:00", "03:00",  # Evening in Pacific US (7-8 PM PT)
-    "19:30", "04:30"   # Additional times covering multiple US time zones
-]
-
-# Schedule posts at optimal times based on POSTS_PER_DAY setting
-def schedule_posts():
-    # Clear any existing jobs
-    schedule.clear()
-    
-    # Select posting times based on POSTS_PER_DAY
-    if POSTS_PER_DAY < 4:
-        post_times = optimal_times[:4]  # Minimum 4 posts
-    elif POSTS_PER_DAY > 10:
-        post_times = optimal_times[:10]  # Maximum 10 posts
-    else:
-        post_times = optimal_times[:POSTS_PER_DAY]
-    
-    # Schedule each post using UTC times
-    for time_str in post_times:
-        schedule.every().day.at(time_str, "UTC").do(post_tweet)
-        log_message(f"📅 Scheduled post at {time_str} UTC")
-    
-    log_message(f"🔄 Set up {len(post_times)} posts per day")
-
-# Function to verify Twitter API credentials
-def verify_twitter_credentials():
-    log_message("🔄 Verifying Twitter API credentials...")
-    try:
-        url = "https://api.twitter.com/2/users/me"
-        headers = get_oauth_headers("GET", url)
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code == 200:
-            user_data = response.json().get('data', {})
-            log_message(f"✅ Twitter API credentials verified! Authenticated as: @{user_data.get('username')}")
-            return True
-        else:
-            log_message(f"❌ Twitter API credential verification failed: {response.status_code} - {response.text}")
-            log_message("⚠️ Please check your API keys in the .env file")
-            return False
-            
-    except Exception as e:
-        log_message(f"❌ Twitter API credential verification failed: {str(e)}")
-        log_message("⚠️ Please check your API keys in the .env file")
-        log_message("⚠️ Common issues:")
-        log_message("  1. Incorrect API keys or tokens")
-        log_message("  2. Expired credentials")
-        log_message("  3. App not properly set up in Twitter Developer Portal")
-        return False
-
-# Main execution
-if __name__ == "__main__":
-    log_message("🚀 Auto Tweet Bot Started (Twitter API v2)")
-    log_message(f"⚙️ Configuration: {POSTS_PER_DAY} posts per day")
-    
-    # Install required packages if not already installed
-    try:
-        import requests_toolbelt
-    except ImportError:
-        log_message("📦 Installing required package: requests-toolbelt")
-        import subprocess
-        subprocess.check_call(["pip", "install", "requests-toolbelt"])
-        log_message("✅ Package installed successfully")
-        import requests_toolbelt
-    
-    # Verify Twitter API credentials before proceeding
-    if not verify_twitter_credentials():
-        log_message("⚠️ Twitter API credential verification failed. Please fix the issues before continuing.")
-        log_message("👉 See the README.md file for troubleshooting the 403 Forbidden error.")
-        exit()
-    
-    # Initial tweet loading
-    tweets_list, tweet_count = load_tweets_from_excel()
-    if not tweets_list or tweet_count == 0:
-        log_message("⚠️ No tweets found in the Excel file. Please add tweets and restart.")
-        exit()
-    
-    total_tweets = tweet_count
-    log_message(f"📊 Loaded {total_tweets} tweets from Excel file")
-    
-    # Schedule posts
-    schedule_posts()
-    
-    # Run the scheduler
-    log_message("⏱️ Scheduler running. Press Ctrl+C to stop.")
-    
-    try:
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
-    except KeyboardInterrupt:
-        log_message("👋 Auto Tweet Bot stopped by user")
-    except Exception as e:
-        log_message(f"❌ Error in main loop: {e}")
+import os
+import argparse
+import array
+import time
+import random
+import base64
+import bisect
+import csv
+import contextlib
+import json
+import atexit
+import collections
+import functools
+import heapq
+import itertools
+import hmac
+import re
+import sys
+import hashlib
+import math
+import mmap
+import uuid
+import urllib.parse
+import threading
+import unicodedata
+import sqlite3
+import struct
+import shutil
+import subprocess
+import importlib.util
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+# Heavy dependencies (requests, requests_toolbelt, openpyxl, dotenv) are imported
+# by the functions that use them, so importing this module is fast and has no side effects
+
+# Twitter API credentials from .env file (filled in by load_config)
+TWITTER_API_KEY = None
+TWITTER_API_SECRET = None
+TWITTER_ACCESS_TOKEN = None
+TWITTER_ACCESS_SECRET = None
+TWITTER_BEARER_TOKEN = None
+
+# Telegram Bot credentials (filled in by load_config)
+TELEGRAM_BOT_TOKEN = None
+TELEGRAM_CHAT_ID = None
+
+# API base URLs (set TWITTER_API_BASE, TWITTER_UPLOAD_BASE or TELEGRAM_API_BASE to use fake_twitter_server.py instead)
+TWITTER_API_BASE = "https://api.twitter.com"
+TWITTER_UPLOAD_BASE = "https://upload.twitter.com"
+TELEGRAM_API_BASE = "https://api.telegram.org"
+
+# Configuration - easily change the number of posts per day (between 4-10)
+POSTS_PER_DAY = 4  # Default: 4 posts per day
+
+# SQLite file that keeps the bot's state (posting journal, media cache) across restarts
+STATE_DB_FILE = "autotweets_state.db"
+
+# HTTP connection pool settings shared by every Twitter and Telegram call
+HTTP_POOL_SIZE = 10  # Keep-alive connections kept open per host
+HTTP_TIMEOUT = 30  # Seconds before a request is abandoned
+
+# Metrics settings (filled in by load_config from METRICS_PORT and METRICS_JSON_FILE)
+METRICS_PORT = None  # Serve Prometheus metrics on http://127.0.0.1:<port>/metrics when set
+METRICS_JSON_FILE = None  # Write all metrics to this JSON file on shutdown when set
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # Span histogram bounds in seconds
+
+# Timing span around one step of the posting path; records its duration when it ends
+class MetricsSpan:
+    __slots__ = ('metrics', 'name', 'started')
+    
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+        if exc_type is not None:
+            self.metrics.inc(f"{self.name}_errors")
+        return False
+
+# Timing histograms and counters for the posting path, exposed in Prometheus text format;
+# while disabled, span() hands out one shared no-op context and inc()/observe() return at once
+class Metrics:
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.enabled = False
+        self.buckets = buckets
+        self._histograms = {}
+        self._counters = collections.Counter()
+        self._lock = threading.Lock()
+        self._server = None
+        self._null_span = contextlib.nullcontext()
+    
+    def span(self, name):
+        if not self.enabled:
+            return self._null_span
+        return MetricsSpan(self, name)
+    
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            histogram['sum'] += seconds
+            histogram['count'] += 1
+            index = bisect.bisect_left(self.buckets, seconds)
+            if index < len(self.buckets):
+                histogram['buckets'][index] += 1
+    
+    def inc(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] += amount
+    
+    # All metrics as plain data (for the JSON dump)
+    def snapshot(self):
+        with self._lock:
+            spans = {}
+            for name, histogram in self._histograms.items():
+                spans[name] = {
+                    'count': histogram['count'],
+                    'sum_seconds': histogram['sum'],
+                    'mean_seconds': histogram['sum'] / histogram['count'],
+                    'buckets': dict(zip([str(bound) for bound in self.buckets], itertools.accumulate(histogram['buckets'])))
+                }
+            return {'spans': spans, 'counters': dict(self._counters)}
+    
+    # All metrics in the Prometheus text exposition format
+    def render(self):
+        lines = [
+            "# HELP autotweets_span_seconds Time spent in each step of the posting path.",
+            "# TYPE autotweets_span_seconds histogram"
+        ]
+        with self._lock:
+            for name, histogram in sorted(self._histograms.items()):
+                for bound, count in zip(self.buckets, itertools.accumulate(histogram['buckets'])):
+                    lines.append(f'autotweets_span_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+                lines.append(f'autotweets_span_seconds_bucket{{span="{name}",le="+Inf"}} {histogram["count"]}')
+                lines.append(f'autotweets_span_seconds_sum{{span="{name}"}} {histogram["sum"]:.6f}')
+                lines.append(f'autotweets_span_seconds_count{{span="{name}"}} {histogram["count"]}')
+            for name, value in sorted(self._counters.items()):
+                lines.append(f"# TYPE autotweets_{name}_total counter")
+                lines.append(f"autotweets_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+    
+    # Serve /metrics on a background thread (local interface only)
+    def serve(self, port, host="127.0.0.1"):
+        # Imported here so runs without a metrics port don't pay for http.server at startup
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        
+        metrics = self
+        
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.enabled = True
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+    
+    def dump(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.snapshot(), file, indent=2)
+    
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+metrics = Metrics()
+
+# Rate limit handling shared by every API call
+API_MAX_RETRIES = 4  # Retries of a request answered with 429 or a 5xx error
+API_RETRY_BASE_DELAY = 1.0  # Seconds before the first retry; doubles with every further retry
+API_RETRY_MAX_DELAY = 60.0  # Longest backoff between two retries
+RATE_LIMIT_MAX_WAIT = 15 * 60  # Longest wait for a rate limit window to reset before giving up on a request
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Raised when a request can't be sent without waiting longer than RATE_LIMIT_MAX_WAIT
+class RateLimitError(Exception):
+    pass
+
+# Token bucket per endpoint and user token, learned from the x-rate-limit-* response headers:
+# the bucket holds the requests left in the current window and refills when the window resets
+class RateLimitGovernor:
+    def __init__(self, max_wait=RATE_LIMIT_MAX_WAIT):
+        self.max_wait = max_wait
+        self._buckets = {}
+        self._lock = threading.Lock()
+    
+    # Endpoints are limited per user, so the key includes the OAuth token of the request
+    @staticmethod
+    def key_for(method, url, headers=None):
+        parts = urllib.parse.urlsplit(url)
+        token = re.search(r'oauth_token="([^"]*)"', (headers or {}).get('Authorization', ''))
+        return (method.upper(), parts.netloc, parts.path, token.group(1) if token else None)
+    
+    # Endpoint of a key for log lines: host and the last path segment only, so no secret in the
+    # path (the Telegram bot token is part of its URL) ends up in the log or in Telegram
+    @staticmethod
+    def label_for(key):
+        return f"{key[1]} {key[2].rsplit('/', 1)[-1]}"
+    
+    # Take a token before sending a request, waiting for the window to reset if the bucket is empty
+    def acquire(self, key):
+        while True:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    return
+                now = time.time()
+                if now >= bucket['reset']:
+                    # Window has reset; the next response tells us the new limit
+                    del self._buckets[key]
+                    return
+                if bucket['remaining'] > 0:
+                    bucket['remaining'] -= 1
+                    return
+                wait = bucket['reset'] - now
+            
+            if wait > self.max_wait:
+                raise RateLimitError(f"Rate limit for {self.label_for(key)} exhausted; resets in {int(wait)} seconds")
+            metrics.inc("rate_limit_waits")
+            log_message(f"⏳ Rate limit for {self.label_for(key)} reached. Waiting {int(wait) + 1} seconds for it to reset...")
+            time.sleep(wait + 0.5)
+    
+    # Learn the endpoint's limit from a response
+    def update(self, key, response):
+        headers = response.headers
+        remaining = headers.get('x-rate-limit-remaining')
+        reset = headers.get('x-rate-limit-reset')
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining = int(remaining)
+            reset = float(reset)
+        except ValueError:
+            return
+        with self._lock:
+            self._buckets[key] = {
+                'limit': int(headers.get('x-rate-limit-limit') or remaining),
+                'remaining': remaining,
+                'reset': reset
+            }
+    
+    # Seconds to wait before retrying a response: the server's hint for 429, jittered exponential backoff otherwise
+    def retry_delay(self, key, response, attempt):
+        delay = random.uniform(0, min(API_RETRY_MAX_DELAY, API_RETRY_BASE_DELAY * 2 ** attempt))
+        if response.status_code == 429:
+            retry_after = response.headers.get('retry-after')
+            reset = response.headers.get('x-rate-limit-reset')
+            try:
+                # Telegram puts its hint in the body: {"parameters": {"retry_after": 5}}
+                if retry_after is None and 'json' in response.headers.get('content-type', ''):
+                    retry_after = (response.json().get('parameters') or {}).get('retry_after')
+                if retry_after is not None:
+                    delay = max(delay, float(retry_after))
+                elif reset is not None:
+                    delay = max(delay, float(reset) - time.time() + 0.5)
+            except ValueError:
+                pass
+        return delay
+    
+    # Snapshot of the known limits, for diagnostics
+    def limits(self):
+        with self._lock:
+            return {key: dict(bucket) for key, bucket in self._buckets.items()}
+
+# Shared API client that keeps one pooled keep-alive session per host,
+# so consecutive calls reuse connections instead of paying a TCP+TLS handshake each time;
+# every request goes through the rate limit governor and is retried on 429 and 5xx errors
+class ApiClient:
+    def __init__(self, pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.governor = RateLimitGovernor()
+        self._sessions = {}
+        self._lock = threading.Lock()
+    
+    # Get (or create) the pooled session for the host of a URL
+    def session_for(self, url):
+        host = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[host] = session
+        return session
+    
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        key = self.governor.key_for(method, url, kwargs.get('headers'))
+        
+        # A streamed body (segment uploads) can't be sent twice; its caller retries it instead
+        retries = 0 if hasattr(kwargs.get('data'), 'read') else API_MAX_RETRIES
+        
+        for attempt in range(retries + 1):
+            self.governor.acquire(key)
+            response = self.session_for(url).request(method, url, **kwargs)
+            self.governor.update(key, response)
+            
+            if response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+                return response
+            
+            delay = self.governor.retry_delay(key, response, attempt)
+            if delay > self.governor.max_wait:
+                return response
+            metrics.inc("http_retries")
+            log_message(f"⏳ {method} {self.governor.label_for(key)} returned {response.status_code}. Retrying in {delay:.1f} seconds (attempt {attempt + 2}/{retries + 1})...")
+            time.sleep(delay)
+    
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+    
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+    
+    # Count connections opened vs. reused across all hosts (from urllib3's pool counters)
+    def connection_stats(self):
+        opened = 0
+        requests_sent = 0
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            for adapter in {id(a): a for a in session.adapters.values()}.values():
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools[key]
+                    opened += pool.num_connections
+                    requests_sent += pool.num_requests
+        return {'opened': opened, 'reused': max(requests_sent - opened, 0), 'requests': requests_sent}
+    
+    def close(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+api_client = ApiClient()
+
+# Telegram delivery settings
+TELEGRAM_FLUSH_INTERVAL = 2.0  # Seconds of log lines batched into one Telegram message
+TELEGRAM_MIN_SEND_INTERVAL = 1.0  # Telegram allows about one message per second per chat
+TELEGRAM_QUEUE_SIZE = 1000  # Log lines kept waiting before the oldest ones are dropped
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096  # Telegram's limit for a single message
+
+# Function to send message to Telegram (blocks until Telegram answers; use log_message from the posting path)
+def send_telegram_message(message):
+    try:
+        if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
+            url = f"{TELEGRAM_API_BASE}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+            with metrics.span("telegram_send"):
+                response = api_client.post(url, data={'chat_id': TELEGRAM_CHAT_ID, 'text': message})
+            
+            # A 429 was already waited out and retried by api_client (Telegram's retry_after included)
+            if response.status_code != 200:
+                metrics.inc("telegram_errors")
+                print(f"❌ Telegram error: {response.status_code} - {response.text}")
+                return False
+            metrics.inc("telegram_messages")
+            # Every line of a batch was already printed when it was logged; don't echo it all again
+            lines = message.count("\n") + 1
+            print(f"📱 Telegram message sent ({lines} lines, {len(message)} characters)")
+            return True
+    except Exception as e:
+        print(f"❌ Telegram error: {e}")
+    return False
+
+# Background Telegram delivery: log lines are queued and a worker thread sends them
+# in batches, so posting never waits on a Telegram round trip
+class TelegramNotifier:
+    def __init__(self, flush_interval=TELEGRAM_FLUSH_INTERVAL, min_send_interval=TELEGRAM_MIN_SEND_INTERVAL, queue_size=TELEGRAM_QUEUE_SIZE):
+        self.flush_interval = flush_interval
+        self.min_send_interval = min_send_interval
+        self.queue_size = queue_size
+        self._lines = collections.deque()
+        self._dropped = 0
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopping = False
+    
+    # Queue a log line for delivery (never blocks on the network)
+    def enqueue(self, line):
+        if not (TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID):
+            return
+        
+        # Lines logged while sending (retries of a failing send) are only printed; queueing them
+        # would make every failed send produce more messages to send
+        if getattr(_log_context, 'sending_telegram', False):
+            return
+        
+        with self._condition:
+            # On overflow drop the oldest lines and report how many were lost
+            if len(self._lines) >= self.queue_size:
+                self._lines.popleft()
+                self._dropped += 1
+            self._lines.append(line)
+            
+            if self._thread is None and not self._stopping:
+                self._thread = threading.Thread(target=self._run, name="telegram-notifier", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+            self._condition.notify()
+    
+    # Take as many queued lines as fit into one Telegram message
+    def _take_batch(self):
+        parts = []
+        length = 0
+        if self._dropped:
+            parts.append(f"⚠️ {self._dropped} log lines dropped (Telegram queue full)")
+            length = len(parts[0])
+            self._dropped = 0
+        
+        while self._lines:
+            line = self._lines[0][:TELEGRAM_MAX_MESSAGE_LENGTH]
+            if parts and length + 1 + len(line) > TELEGRAM_MAX_MESSAGE_LENGTH:
+                break
+            self._lines.popleft()
+            length += len(line) + (1 if parts else 0)
+            parts.append(line)
+        return "\n".join(parts)
+    
+    def _run(self):
+        last_send = 0.0
+        while True:
+            with self._condition:
+                while not self._lines and not self._dropped and not self._stopping:
+                    self._condition.wait()
+                if not self._lines and not self._dropped:
+                    return
+                
+                # Let the flush window fill up so a burst of lines goes out as one message
+                if not self._stopping:
+                    self._condition.wait_for(lambda: self._stopping, timeout=self.flush_interval)
+                batch = self._take_batch()
+            
+            # Respect Telegram's per-chat rate limit
+            wait = self.min_send_interval - (time.monotonic() - last_send)
+            if wait > 0:
+                time.sleep(wait)
+            _log_context.sending_telegram = True
+            try:
+                send_telegram_message(batch)
+            finally:
+                _log_context.sending_telegram = False
+            last_send = time.monotonic()
+    
+    # Deliver whatever is still queued and stop the worker (called on shutdown)
+    def stop(self, timeout=30):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+telegram_notifier = TelegramNotifier()
+
+# Per-thread log context; workers posting for a named account prefix their lines with it
+_log_context = threading.local()
+
+# Custom print function that also sends to Telegram (in the background)
+def log_message(message):
+    prefix = getattr(_log_context, 'prefix', "")
+    if prefix:
+        message = f"{prefix}{message}"
+    print(message)
+    telegram_notifier.enqueue(message)
+
+# Function to percent-encode a value as OAuth 1.0a requires (RFC 3986, nothing left unescaped but unreserved characters)
+def oauth_quote(value):
+    return urllib.parse.quote(value, safe='~')
+
+# Reusable OAuth 1.0a signer: the signing key and the static OAuth parameters are encoded once,
+# so signing a request only costs the nonce, the base string and one HMAC
+class OAuth1Signer:
+    def __init__(self, consumer_key, consumer_secret, access_token, access_secret):
+        self._signing_key = f"{oauth_quote(consumer_secret or '')}&{oauth_quote(access_secret or '')}".encode()
+        
+        static_params = {
+            'oauth_consumer_key': consumer_key or '',
+            'oauth_signature_method': 'HMAC-SHA1',
+            'oauth_token': access_token or '',
+            'oauth_version': '1.0'
+        }
+        self._static_params = [(oauth_quote(k), oauth_quote(v)) for k, v in static_params.items()]
+        self._static_header = ', '.join([f'{k}="{v}"' for k, v in self._static_params])
+    
+    # Sign a request and return its Authorization header
+    # params are the query or form-encoded body parameters (a JSON or multipart body is not signed)
+    def sign(self, method, url, params=None):
+        oauth_timestamp = str(int(time.time()))
+        oauth_nonce = uuid.uuid4().hex
+        
+        pairs = self._static_params + [('oauth_nonce', oauth_nonce), ('oauth_timestamp', oauth_timestamp)]
+        if params:
+            pairs += [(oauth_quote(k), oauth_quote(str(v))) for k, v in params.items()]
+        pairs.sort()
+        
+        # Create signature base string
+        base_string_params = '&'.join([f"{k}={v}" for k, v in pairs])
+        base_string = f"{method.upper()}&{oauth_quote(url)}&{oauth_quote(base_string_params)}"
+        
+        # Create signature
+        signature = base64.b64encode(hmac.new(self._signing_key, base_string.encode(), hashlib.sha1).digest()).decode()
+        
+        return f'OAuth {self._static_header}, oauth_nonce="{oauth_nonce}", oauth_signature="{oauth_quote(signature)}", oauth_timestamp="{oauth_timestamp}"'
+
+twitter_signer = None
+
+# Function to load credentials from the environment and .env file
+def load_config():
+    global TWITTER_API_KEY, TWITTER_API_SECRET, TWITTER_ACCESS_TOKEN, TWITTER_ACCESS_SECRET, TWITTER_BEARER_TOKEN
+    global TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, twitter_signer, default_account
+    global TWITTER_API_BASE, TWITTER_UPLOAD_BASE, TELEGRAM_API_BASE, MEDIA_UPLOAD_URL
+    global METRICS_PORT, METRICS_JSON_FILE, TWEETS_FILE, influencers
+    from dotenv import load_dotenv
+    
+    # Load environment variables
+    load_dotenv()
+    
+    TWITTER_API_KEY = os.getenv("TWITTER_API_KEY")
+    TWITTER_API_SECRET = os.getenv("TWITTER_API_SECRET")
+    TWITTER_ACCESS_TOKEN = os.getenv("TWITTER_ACCESS_TOKEN")
+    TWITTER_ACCESS_SECRET = os.getenv("TWITTER_ACCESS_SECRET")
+    TWITTER_BEARER_TOKEN = os.getenv("TWITTER_BEARER_TOKEN")
+    
+    TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+    TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+    
+    TWITTER_API_BASE = os.getenv("TWITTER_API_BASE", TWITTER_API_BASE).rstrip('/')
+    TWITTER_UPLOAD_BASE = os.getenv("TWITTER_UPLOAD_BASE", TWITTER_UPLOAD_BASE).rstrip('/')
+    TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", TELEGRAM_API_BASE).rstrip('/')
+    MEDIA_UPLOAD_URL = f"{TWITTER_UPLOAD_BASE}/1.1/media/upload.json"
+    
+    METRICS_PORT = int(os.getenv("METRICS_PORT")) if os.getenv("METRICS_PORT") else None
+    METRICS_JSON_FILE = os.getenv("METRICS_JSON_FILE") or None
+    TWEETS_FILE = os.getenv("TWEETS_FILE") or TWEETS_FILE
+    
+    # An influencers file replaces the built-in list
+    if os.path.exists(INFLUENCERS_FILE):
+        loaded = load_influencers(INFLUENCERS_FILE)
+        if loaded:
+            influencers = loaded
+    
+    twitter_signer = OAuth1Signer(TWITTER_API_KEY, TWITTER_API_SECRET, TWITTER_ACCESS_TOKEN, TWITTER_ACCESS_SECRET)
+    default_account = Account("default", twitter_signer)
+
+# Function to create OAuth 1.0a headers for Twitter API v2
+def get_oauth_headers(method="GET", url="", params=None, signer=None):
+    return {
+        'Authorization': (signer or twitter_signer).sign(method, url, params),
+        'Content-Type': 'application/json'
+    }
+
+# Size of each APPEND segment (Twitter accepts up to 5MB per segment)
+MEDIA_SEGMENT_SIZE = 4 * 1024 * 1024  # 4MB segments
+
+# Number of APPEND segments uploaded in parallel (1 uploads them one after another)
+MEDIA_UPLOAD_CONCURRENCY = 4
+
+# Number of times a failed APPEND segment is retried before the upload is abandoned
+MEDIA_SEGMENT_RETRIES = 3
+
+# Each upload worker thread keeps one reusable segment buffer
+_segment_buffers = threading.local()
+
+# Read-only file-like view over one segment, so MultipartEncoder can stream it without copying
+class SegmentReader:
+    def __init__(self, view):
+        self._view = view
+        self._position = 0
+    
+    # MultipartEncoder treats len() as the number of bytes still left to read
+    def __len__(self):
+        return len(self._view) - self._position
+    
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = len(self)
+        start = self._position
+        self._position = min(start + size, len(self._view))
+        return self._view[start:self._position].tobytes()
+
+# Function to read one segment of a media file into the calling thread's buffer
+def read_media_segment(media_path, offset, length):
+    buffer = getattr(_segment_buffers, 'buffer', None)
+    if buffer is None or len(buffer) < length:
+        buffer = bytearray(length)
+        _segment_buffers.buffer = buffer
+    
+    view = memoryview(buffer)[:length]
+    with open(media_path, 'rb') as file:
+        file.seek(offset)
+        bytes_read = file.readinto(view)
+    return view[:bytes_read]
+
+# Function to upload a single APPEND segment, retrying it on failure
+def append_media_segment(url, media_id, media_path, segment_index, offset, length, media_type, signer):
+    from requests_toolbelt.multipart.encoder import MultipartEncoder
+    
+    segment = read_media_segment(media_path, offset, length)
+    error = None
+    
+    for attempt in range(MEDIA_SEGMENT_RETRIES + 1):
+        if attempt:
+            # Back off a little more after each failed attempt
+            time.sleep(min(2 ** attempt, 30))
+            log_message(f"🔄 Retrying APPEND for segment {segment_index} (attempt {attempt + 1}/{MEDIA_SEGMENT_RETRIES + 1})")
+        
+        try:
+            # Create multipart form data
+            mp_encoder = MultipartEncoder(
+                fields={
+                    'command': 'APPEND',
+                    'media_id': media_id,
+                    'segment_index': str(segment_index),
+                    'media': ('media', SegmentReader(segment), media_type)
+                }
+            )
+            
+            # Headers for APPEND (multipart fields are not part of the OAuth signature)
+            headers = {
+                'Authorization': signer.sign("POST", url),
+                'Content-Type': mp_encoder.content_type
+            }
+            
+            # Make APPEND request
+            response = api_client.post(url, headers=headers, data=mp_encoder)
+            
+            if response.status_code in (200, 204):
+                log_message(f"✅ Media upload APPEND successful for segment {segment_index}")
+                return True
+            
+            # Rate limited: the whole upload is given up so the tweet is kept for a later slot
+            if response.status_code == 429:
+                raise RateLimitError(f"Media upload APPEND rate limited: {response.text}")
+            
+            error = f"{response.status_code} - {response.text}"
+        except RateLimitError:
+            raise
+        except Exception as e:
+            error = str(e)
+    
+    log_message(f"❌ Media upload APPEND failed for segment {segment_index}: {error}")
+    return False
+
+# Function to run a function in a worker thread with the given log prefix
+def run_with_log_prefix(prefix, function, *args):
+    _log_context.prefix = prefix
+    try:
+        return function(*args)
+    finally:
+        _log_context.prefix = ""
+
+# Function to upload all APPEND segments of a media file with a bounded worker pool
+def append_media_segments(url, media_id, media_path, file_size, media_type, signer):
+    segments = [(index, offset, min(MEDIA_SEGMENT_SIZE, file_size - offset))
+                for index, offset in enumerate(range(0, file_size, MEDIA_SEGMENT_SIZE))]
+    
+    with ThreadPoolExecutor(max_workers=max(1, MEDIA_UPLOAD_CONCURRENCY)) as executor:
+        # Segment workers log with the same account prefix as the caller
+        prefix = getattr(_log_context, 'prefix', "")
+        futures = [executor.submit(run_with_log_prefix, prefix, append_media_segment, url, media_id, media_path, index, offset, length, media_type, signer)
+                   for index, offset, length in segments]
+        
+        for future in as_completed(futures):
+            try:
+                appended = future.result()
+            except RateLimitError:
+                for pending in futures:
+                    pending.cancel()
+                raise
+            if not appended:
+                # No point sending the remaining segments once one of them has failed for good
+                for pending in futures:
+                    pending.cancel()
+                return False
+    
+    return True
+
+# For Twitter API v1.1 media upload (still used for media)
+MEDIA_UPLOAD_URL = f"{TWITTER_UPLOAD_BASE}/1.1/media/upload.json"
+
+# Function to get an already-resolved future
+def completed_future(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+# Shared video processing poller: one background thread tracks every media ID still being
+# processed, sends each STATUS check when its check_after_secs is up, and resolves the
+# upload's future when processing finishes, so no upload worker sleeps while videos process
+class ProcessingPoller:
+    def __init__(self):
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopping = False
+    
+    # Watch a media ID until processing is done; the future resolves to (media_id, expires_after_secs) or None
+    def watch(self, media_id, signer, check_after_secs, expires_after_secs=None):
+        future = Future()
+        prefix = getattr(_log_context, 'prefix', "")
+        log_message(f"🔄 Video processing in progress. Checking again in {check_after_secs} seconds...")
+        with self._condition:
+            heapq.heappush(self._heap, (time.monotonic() + check_after_secs, next(self._sequence), media_id, signer, expires_after_secs, prefix, future))
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="processing-poller", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return future
+    
+    # Number of media IDs still being processed
+    def pending(self):
+        with self._condition:
+            return len(self._heap)
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopping and self._thread is threading.current_thread():
+                    delay = self._heap[0][0] - time.monotonic() if self._heap else None
+                    if delay is not None and delay <= 0:
+                        break
+                    self._condition.wait(delay)
+                if self._stopping or self._thread is not threading.current_thread():
+                    return
+                entry = heapq.heappop(self._heap)
+            
+            _, _, media_id, signer, expires_after_secs, prefix, future = entry
+            try:
+                check_after_secs = run_with_log_prefix(prefix, self._check, media_id, signer, expires_after_secs, future)
+            except Exception as e:
+                run_with_log_prefix(prefix, log_message, f"❌ Media upload STATUS check failed: {str(e)}")
+                future.set_result(None)
+                continue
+            
+            # Still processing: check again when Twitter says to, unless stop() was called during the check
+            # (it has already resolved everything else; this thread is no longer the poller after a restart)
+            if check_after_secs is not None:
+                with self._condition:
+                    stopped = self._stopping or self._thread is not threading.current_thread()
+                    if not stopped:
+                        heapq.heappush(self._heap, (time.monotonic() + check_after_secs, next(self._sequence), media_id, signer, expires_after_secs, prefix, future))
+                if stopped:
+                    future.set_result(None)
+                    return
+    
+    # Send one STATUS check; resolves the future when done, else returns when to check again
+    def _check(self, media_id, signer, expires_after_secs, future):
+        params = {
+            'command': 'STATUS',
+            'media_id': media_id
+        }
+        headers = {
+            'Authorization': signer.sign("GET", MEDIA_UPLOAD_URL, params)
+        }
+        with metrics.span("upload_status"):
+            response = api_client.get(MEDIA_UPLOAD_URL, params=params, headers=headers)
+        
+        if response.status_code != 200:
+            log_message(f"❌ Media upload STATUS check failed: {response.text}")
+            future.set_result(None)
+            return None
+        
+        processing_info = response.json().get('processing_info')
+        state = processing_info.get('state') if processing_info else 'succeeded'
+        
+        if state == 'pending' or state == 'in_progress':
+            check_after_secs = processing_info.get('check_after_secs', 5)
+            log_message(f"🔄 Video processing in progress. Checking again in {check_after_secs} seconds...")
+            return check_after_secs
+        
+        if state == 'failed':
+            error = processing_info.get('error')
+            log_message(f"❌ Video processing failed: {error}")
+            future.set_result(None)
+            return None
+        
+        log_message("✅ Video processing completed successfully")
+        future.set_result((media_id, expires_after_secs))
+        return None
+    
+    # Stop polling; uploads still processing resolve to None
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            pending = [entry[-1] for entry in self._heap]
+            self._heap.clear()
+            self._thread = None
+            self._condition.notify()
+        for future in pending:
+            future.set_result(None)
+
+processing_poller = ProcessingPoller()
+
+# Function to upload a media file to Twitter
+# Returns None if the upload failed, else a future that resolves to (media ID, seconds until the ID expires),
+# or to None if video processing fails; videos are still processing when this returns
+def start_media_upload(media_path, account=None):
+    signer = account.signer if account else twitter_signer
+    log_message(f"🔄 Uploading media: {media_path}")
+    
+    try:
+        # Step 1: INIT - Initialize the upload
+        # Only the size is needed up front; the data is streamed from disk in Step 2
+        file_size = os.path.getsize(media_path)
+        media_type = media_type_of(media_path) or "application/octet-stream"
+        
+        url = MEDIA_UPLOAD_URL
+        
+        # Data for INIT
+        data = {
+            'command': 'INIT',
+            'total_bytes': str(file_size),
+            'media_type': media_type
+        }
+        
+        # Headers for the request
+        headers = {
+            'Authorization': signer.sign("POST", url, data),
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
+        
+        # Make INIT request
+        with metrics.span("upload_init"):
+            response = api_client.post(url, headers=headers, data=data)
+        
+        # Still rate limited after the retries: the tweet is kept for the next slot instead of skipped
+        if response.status_code == 429:
+            raise RateLimitError(f"Media upload INIT rate limited: {response.text}")
+        
+        if response.status_code != 200:
+            log_message(f"❌ Media upload INIT failed: {response.text}")
+            return None
+        
+        media_id = response.json()['media_id_string']
+        log_message(f"✅ Media upload INIT successful. Media ID: {media_id}")
+        
+        # Step 2: APPEND - Upload the segments concurrently, then FINALIZE once all of them succeeded
+        with metrics.span("upload_append"):
+            appended = append_media_segments(url, media_id, media_path, file_size, media_type, signer)
+        if not appended:
+            return None
+        
+        # Step 3: FINALIZE - Finalize the upload
+        data = {
+            'command': 'FINALIZE',
+            'media_id': media_id
+        }
+        
+        # Headers for FINALIZE
+        headers = {
+            'Authorization': signer.sign("POST", url, data),
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
+        
+        # Make FINALIZE request
+        with metrics.span("upload_finalize"):
+            response = api_client.post(url, headers=headers, data=data)
+        
+        if response.status_code == 429:
+            raise RateLimitError(f"Media upload FINALIZE rate limited: {response.text}")
+        
+        if response.status_code != 200:
+            log_message(f"❌ Media upload FINALIZE failed: {response.text}")
+            return None
+        
+        log_message(f"✅ Media upload FINALIZE successful")
+        expires_after_secs = response.json().get('expires_after_secs')
+        
+        # If it's a video, the shared poller waits for processing to finish
+        if media_type.startswith('video'):
+            processing_info = response.json().get('processing_info')
+            if processing_info:
+                state = processing_info.get('state')
+                if state == 'pending' or state == 'in_progress':
+                    return processing_poller.watch(media_id, signer, processing_info.get('check_after_secs', 5), expires_after_secs)
+                
+                if state == 'failed':
+                    log_message(f"❌ Video processing failed: {processing_info.get('error')}")
+                    return None
+                
+                log_message("✅ Video processing completed successfully")
+        
+        return completed_future((media_id, expires_after_secs))
+        
+    except RateLimitError:
+        raise
+    except Exception as e:
+        log_message(f"❌ Media upload error: {str(e)}")
+        return None
+
+# Twitter's media limits: up to 4 images per tweet, or a single video or GIF
+MAX_MEDIA_PER_TWEET = 4
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+MAX_GIF_BYTES = 15 * 1024 * 1024
+MAX_VIDEO_BYTES = 512 * 1024 * 1024
+MAX_VIDEO_SECONDS = 140  # Longest video a standard account can post
+
+# Media preprocessing: oversized images are resized/recompressed (needs Pillow) and .mov or large videos
+# are transcoded to H.264/AAC MP4 (needs ffmpeg on PATH); without the tool, files are uploaded as they are
+PREPARED_MEDIA_FOLDER = ".prepared_media"  # Converted files, named by source content hash + settings
+MEDIA_PREPROCESS_WORKERS = 2  # Conversions running in parallel (separate processes)
+IMAGE_MAX_DIMENSION = 4096  # Longest side of a converted image in pixels
+IMAGE_JPEG_QUALITY = 85  # Starting JPEG quality; lowered until the image fits MAX_IMAGE_BYTES
+VIDEO_TRANSCODE_ABOVE_BYTES = 15 * 1024 * 1024  # MP4 videos larger than this are transcoded
+VIDEO_MAX_WIDTH = 1280  # Transcoded videos are scaled down to this width
+VIDEO_CRF = 23  # x264 quality (lower is better and bigger)
+VIDEO_MAX_BITRATE_KBPS = 5000  # Bitrate cap of transcoded videos
+
+# Function to get the preprocessing settings (part of the cache key, so changing one converts files again)
+def media_preprocess_settings():
+    return {
+        'version': 1,
+        'max_image_bytes': MAX_IMAGE_BYTES,
+        'image_max_dimension': IMAGE_MAX_DIMENSION,
+        'image_jpeg_quality': IMAGE_JPEG_QUALITY,
+        'video_max_width': VIDEO_MAX_WIDTH,
+        'video_crf': VIDEO_CRF,
+        'video_max_bitrate_kbps': VIDEO_MAX_BITRATE_KBPS
+    }
+
+# Function to shrink an image until it fits the size limit; runs in a worker process
+# Returns the converted file (output_base + extension)
+def convert_image(media_path, output_base, settings):
+    from PIL import Image
+    
+    with Image.open(media_path) as image:
+        image.thumbnail((settings['image_max_dimension'], settings['image_max_dimension']))
+        limit = settings['max_image_bytes']
+        
+        # Transparent images stay PNG if that fits; everything else becomes JPEG
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            output = output_base + '.png'
+            image.save(output + '.tmp', 'PNG', optimize=True)
+            if os.path.getsize(output + '.tmp') <= limit:
+                os.replace(output + '.tmp', output)
+                return output
+            os.remove(output + '.tmp')
+        
+        image = image.convert('RGB')
+        output = output_base + '.jpg'
+        quality = settings['image_jpeg_quality']
+        while True:
+            image.save(output + '.tmp', 'JPEG', quality=quality, optimize=True, progressive=True)
+            if os.path.getsize(output + '.tmp') <= limit:
+                break
+            # Lower the quality first, then the resolution
+            if quality > 60:
+                quality -= 10
+            else:
+                image = image.resize((max(1, image.width * 3 // 4), max(1, image.height * 3 // 4)))
+        os.replace(output + '.tmp', output)
+        return output
+
+# Function to transcode a video to H.264/AAC MP4 with ffmpeg; runs in a worker process
+def convert_video(media_path, output_base, settings):
+    output = output_base + '.mp4'
+    temporary = output_base + '.tmp.mp4'
+    bitrate = settings['video_max_bitrate_kbps']
+    subprocess.run([
+        shutil.which('ffmpeg'), '-y', '-loglevel', 'error', '-i', media_path,
+        '-c:v', 'libx264', '-preset', 'veryfast', '-crf', str(settings['video_crf']),
+        '-maxrate', f"{bitrate}k", '-bufsize', f"{bitrate * 2}k",
+        '-vf', f"scale='min({settings['video_max_width']},iw)':-2", '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac', '-b:a', '128k', '-movflags', '+faststart', temporary
+    ], check=True, capture_output=True)
+    os.replace(temporary, output)
+    return output
+
+# Function to convert one media file; runs in a worker process
+def convert_media_file(media_path, output_base, settings):
+    if (media_type_of(media_path) or '').startswith('video'):
+        return convert_video(media_path, output_base, settings)
+    return convert_image(media_path, output_base, settings)
+
+# Converts media that Twitter would reject or that is needlessly large on a process pool, once per file:
+# results are cached on disk by content hash + settings, and files that are fine are used as they are
+class MediaPreprocessor:
+    def __init__(self, folder=PREPARED_MEDIA_FOLDER, workers=MEDIA_PREPROCESS_WORKERS):
+        self.folder = folder
+        self.workers = workers
+        self._futures = {}
+        self._executor = None
+        self._lock = threading.Lock()
+        self._tools = {}
+    
+    # Whether the tool needed to convert this kind of file is available
+    def can_convert(self, media_path):
+        tool = 'ffmpeg' if (media_type_of(media_path) or '').startswith('video') else 'Pillow'
+        with self._lock:
+            available = self._tools.get(tool)
+            looked_up = available is None
+            if looked_up:
+                if tool == 'ffmpeg':
+                    available = shutil.which('ffmpeg') is not None
+                else:
+                    available = importlib.util.find_spec('PIL') is not None
+                self._tools[tool] = available
+        # Only the thread that looked the tool up warns, so a missing tool is reported once
+        if looked_up and not available:
+            log_message(f"⚠️ {tool} is not installed; media that needs it is uploaded without conversion")
+        return available
+    
+    # Whether a file has to be converted before upload (decided from its size and type alone)
+    @staticmethod
+    def needs_conversion(media_path):
+        size = os.path.getsize(media_path)
+        media_type = media_type_of(media_path)
+        if media_type == 'video/quicktime':
+            return True
+        if media_type == 'video/mp4':
+            return size > VIDEO_TRANSCODE_ABOVE_BYTES
+        # Animated GIFs are allowed up to 15MB and would lose their animation
+        if media_type == 'image/gif':
+            return False
+        return size > MAX_IMAGE_BYTES
+    
+    # Start preparing a file; the future resolves to the path to upload (the original if nothing was converted)
+    def prepare(self, media_path):
+        if not self.needs_conversion(media_path) or not self.can_convert(media_path):
+            return completed_future(media_path)
+        
+        # Imported here so runs that never convert a file don't pay for multiprocessing at startup
+        import multiprocessing
+        from concurrent.futures.process import BrokenProcessPool, ProcessPoolExecutor
+        
+        settings = media_preprocess_settings()
+        key = hashlib.sha256(f"{media_file_digest(media_path)}:{json.dumps(settings, sort_keys=True)}".encode()).hexdigest()
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                return future
+            
+            # Converted by an earlier run
+            for extension in ('.jpg', '.png', '.mp4'):
+                cached = os.path.join(self.folder, key + extension)
+                if os.path.exists(cached):
+                    future = self._futures[key] = completed_future(cached)
+                    return future
+            
+            if self._executor is None:
+                # Spawned workers don't inherit the bot's threads or open connections
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+            os.makedirs(self.folder, exist_ok=True)
+            try:
+                conversion = self._executor.submit(convert_media_file, media_path, os.path.join(self.folder, key), settings)
+            except BrokenProcessPool as e:
+                # A worker died; start a fresh pool for the next file
+                self._executor = None
+                log_message(f"❌ Could not convert {media_path}, uploading it as it is: {e}")
+                return completed_future(media_path)
+            future = self._futures[key] = Future()
+        
+        prefix = getattr(_log_context, 'prefix', "")
+        
+        def finish(conversion):
+            try:
+                output = conversion.result()
+                run_with_log_prefix(prefix, log_message, f"🗜️ Prepared {media_path} for upload: {os.path.getsize(media_path) / (1024 * 1024):.1f}MB -> {os.path.getsize(output) / (1024 * 1024):.1f}MB")
+                future.set_result(output)
+            except Exception as e:
+                run_with_log_prefix(prefix, log_message, f"❌ Could not convert {media_path}, uploading it as it is: {e}")
+                with self._lock:
+                    self._futures.pop(key, None)
+                    if isinstance(e, BrokenProcessPool):
+                        self._executor = None
+                future.set_result(media_path)
+        
+        conversion.add_done_callback(finish)
+        return future
+    
+    # Path to upload for a file, waiting for its conversion if needed
+    def prepared_path(self, media_path):
+        return self.prepare(media_path).result()
+    
+    # Delete converted files whose upload is no longer in the media cache (their media ID expired or
+    # was evicted), and leftovers of interrupted conversions; returns how many files were removed.
+    # A file that is needed again is simply converted again
+    def prune(self, cached_hashes):
+        try:
+            names = os.listdir(self.folder)
+        except FileNotFoundError:
+            return 0
+        
+        with self._lock:
+            in_use = set(self._futures)
+        removed = 0
+        for name in names:
+            path = os.path.join(self.folder, name)
+            key, extension = os.path.splitext(name[:-len('.tmp')] if name.endswith('.tmp') else name)
+            if key in in_use or extension not in ('.jpg', '.png', '.mp4'):
+                continue
+            try:
+                if name.endswith('.tmp') or media_file_digest(path) not in cached_hashes:
+                    os.remove(path)
+                    removed += 1
+            except OSError as e:
+                log_message(f"❌ Could not remove {path}: {e}")
+        return removed
+    
+    def shutdown(self):
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+media_preprocessor = MediaPreprocessor()
+
+# Media IDs are reused until shortly before Twitter expires them
+MEDIA_ID_DEFAULT_LIFETIME = 24 * 60 * 60  # Used when FINALIZE doesn't report expires_after_secs
+MEDIA_ID_EXPIRY_MARGIN = 60 * 60  # Don't reuse a media ID that expires within the next hour
+MEDIA_CACHE_MAX_ENTRIES = 1000  # Least recently used entries are evicted beyond this
+
+# File hashes by (path, modification time, size), so an unchanged file is only hashed once
+_media_digests = {}
+_media_digests_lock = threading.Lock()
+
+# Function to get the content hash of a media file
+def media_file_digest(media_path):
+    stat = os.stat(media_path)
+    key = (os.path.abspath(media_path), stat.st_mtime_ns, stat.st_size)
+    with _media_digests_lock:
+        digest = _media_digests.get(key)
+    if digest is None:
+        digest = file_digest(media_path)
+        with _media_digests_lock:
+            _media_digests[key] = digest
+    return digest
+
+# Persistent cache of uploaded media IDs by account and file content hash, so re-posting the
+# same file within its expiry window reuses the ID instead of uploading the bytes again
+class MediaCache:
+    def __init__(self, path=STATE_DB_FILE, max_entries=MEDIA_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+    
+    # Open the database on first use (importing the module never touches the disk)
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS media_cache (
+                    account TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    media_id TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (account, content_hash)
+                );
+            """)
+            self._conn = conn
+        return self._conn
+    
+    # Get a still-valid media ID for this content, or None
+    def get(self, account_name, content_hash):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT media_id, expires_at FROM media_cache WHERE account = ? AND content_hash = ?",
+                               (account_name, content_hash)).fetchone()
+            if row and row[1] - MEDIA_ID_EXPIRY_MARGIN > now:
+                conn.execute("UPDATE media_cache SET last_used = ? WHERE account = ? AND content_hash = ?",
+                             (now, account_name, content_hash))
+                self.hits += 1
+                return row[0]
+            
+            if row:
+                conn.execute("DELETE FROM media_cache WHERE account = ? AND content_hash = ?", (account_name, content_hash))
+            self.misses += 1
+            return None
+    
+    # Content hashes that still have a valid media ID for some account
+    def content_hashes(self):
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute("SELECT DISTINCT content_hash FROM media_cache WHERE expires_at - ? > ?",
+                                (MEDIA_ID_EXPIRY_MARGIN, time.time())).fetchall()
+        return {row[0] for row in rows}
+    
+    # Remember an uploaded media ID; expired and least recently used entries are evicted
+    def put(self, account_name, content_hash, media_id, expires_after_secs=None):
+        now = time.time()
+        expires_at = now + (expires_after_secs or MEDIA_ID_DEFAULT_LIFETIME)
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("INSERT OR REPLACE INTO media_cache (account, content_hash, media_id, expires_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                             (account_name, content_hash, media_id, expires_at, now))
+                conn.execute("DELETE FROM media_cache WHERE expires_at - ? <= ?", (MEDIA_ID_EXPIRY_MARGIN, now))
+                conn.execute("""
+                    DELETE FROM media_cache WHERE rowid IN (
+                        SELECT rowid FROM media_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+media_cache = MediaCache()
+
+# Uploads in progress by (account, content hash); everyone asking for the same file shares one upload
+_pending_uploads = {}
+_pending_uploads_lock = threading.Lock()
+
+# Function to get a media ID without waiting for it, reusing the media ID of an earlier upload of the same file
+# Returns a future that resolves to the media ID, or None if the upload failed
+def request_media_upload(media_path, account=None):
+    account_name = account.name if account else "default"
+    
+    # Upload the converted file if the original is too large or in a format Twitter rejects
+    media_path = media_preprocessor.prepared_path(media_path)
+    content_hash = media_file_digest(media_path)
+    key = (account_name, content_hash)
+    
+    with _pending_uploads_lock:
+        # Already being uploaded (e.g. by the stager): share that upload
+        future = _pending_uploads.get(key)
+        if future is not None:
+            return future
+        
+        media_id = media_cache.get(account_name, content_hash)
+        if media_id:
+            metrics.inc("media_cache_hits")
+            log_message(f"♻️ Reusing media ID {media_id} for {media_path} (media cache: {media_cache.hits} hits, {media_cache.misses} misses)")
+            return completed_future(media_id)
+        
+        future = Future()
+        _pending_uploads[key] = future
+    
+    metrics.inc("media_cache_misses")
+    log_message(f"🔄 Media cache miss for {media_path} (media cache: {media_cache.hits} hits, {media_cache.misses} misses)")
+    
+    # Cache the ID once the upload (and any video processing) is done, then release the waiters
+    def finish(upload, error=None):
+        media_id = None
+        try:
+            result = upload.result() if upload is not None else None
+            if result:
+                media_id, expires_after_secs = result
+                media_cache.put(account_name, content_hash, media_id, expires_after_secs)
+        except Exception as e:
+            log_message(f"❌ Media upload error: {str(e)}")
+        finally:
+            with _pending_uploads_lock:
+                _pending_uploads.pop(key, None)
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(media_id)
+    
+    try:
+        upload = start_media_upload(media_path, account)
+    except RateLimitError as e:
+        # Rate limited: the caller keeps the tweet for a later slot rather than posting without media
+        finish(None, e)
+        return future
+    except Exception as e:
+        log_message(f"❌ Media upload error: {str(e)}")
+        upload = None
+    
+    if upload is None:
+        finish(None)
+    else:
+        upload.add_done_callback(finish)
+    return future
+
+# Function to upload media to Twitter and wait for the media ID (None if the upload failed, RateLimitError if rate limited)
+def upload_media(media_path, account=None):
+    return request_media_upload(media_path, account).result()
+
+# Function to upload the media of one tweet concurrently and wait for all of them, so a post takes
+# as long as its slowest upload. Returns the media IDs in order, None if any upload failed,
+# or raises RateLimitError if one was rate limited (after all uploads have finished)
+def upload_media_group(media_paths, account=None):
+    if len(media_paths) == 1:
+        media_id = upload_media(media_paths[0], account)
+        return [media_id] if media_id else None
+    
+    prefix = getattr(_log_context, 'prefix', "")
+    with ThreadPoolExecutor(max_workers=len(media_paths), thread_name_prefix="media") as executor:
+        # Each worker only runs the transfer; waiting for video processing is left to the shared poller
+        requests = [executor.submit(run_with_log_prefix, prefix, request_media_upload, media_path, account)
+                    for media_path in media_paths]
+        uploads = [request.result() for request in requests]
+    
+    media_ids = []
+    rate_limited = None
+    for upload in uploads:
+        try:
+            media_ids.append(upload.result())
+        except RateLimitError as e:
+            rate_limited = e
+    if rate_limited:
+        raise rate_limited
+    return media_ids if all(media_ids) else None
+
+# Function to post a tweet with the Twitter API v2
+def post_tweet_v2(text, media_ids=None, account=None):
+    try:
+        url = f"{TWITTER_API_BASE}/2/tweets"
+        
+        payload = {"text": text}
+        
+        # Add media if provided
+        if media_ids:
+            payload["media"] = {"media_ids": list(media_ids)}
+        
+        # Create OAuth 1.0a headers
+        headers = get_oauth_headers("POST", url, signer=account.signer if account else None)
+        
+        with metrics.span("create_tweet"):
+            response = api_client.post(url, json=payload, headers=headers)
+        
+        # Still rate limited after the retries: the tweet is kept for the next slot instead of skipped
+        if response.status_code == 429:
+            raise RateLimitError(f"Tweet posting rate limited: {response.text}")
+        
+        if response.status_code != 201:
+            log_message(f"❌ Tweet posting failed: {response.status_code} - {response.text}")
+            return None
+        
+        return response.json()
+    
+    except RateLimitError:
+        raise
+    except Exception as e:
+        log_message(f"❌ Tweet posting error: {str(e)}")
+        return None
+
+# Tweet list the tweets are read from (.xlsx, .csv, .jsonl, SQLite .db or compiled .tweets, see CONTENT_SOURCES;
+# set TWEETS_FILE in .env to use another one)
+TWEETS_FILE = "tweetlist.xlsx"
+
+# Optional per-row columns of spreadsheet and CSV tweet lists, next to the required 'Tweet' column
+MEDIA_COLUMN = "Media"  # Media file(s) for this tweet instead of the next ones in the rotation (';' separated)
+MENTIONS_COLUMN = "Mentions"  # Handles to mention instead of the influencer rotation (space or comma separated)
+NOT_BEFORE_COLUMN = "Not Before"  # Earliest time the tweet may be posted (ISO date/time, UTC if no zone)
+
+# Table and columns of SQLite tweet lists (only 'text' is required)
+CONTENT_TABLE = "tweets"
+
+# Raised for a tweet list or a row of it that can't be used
+class ContentError(Exception):
+    pass
+
+# Raised when a tweet list changed on disk after it was opened, so its index no longer matches the file;
+# the row can be read again from the list load_content returns now
+class ContentChangedError(ContentError):
+    pass
+
+# One tweet of a tweet list with its optional metadata: media (tuple of up to 4 paths relative to the
+# media folder, or absolute), mentions (tuple of handles, replaces the rotation; empty means no mentions)
+# and not_before (Unix time before which the tweet isn't posted)
+class ContentItem:
+    __slots__ = ('text', 'media', 'mentions', 'not_before')
+    
+    def __init__(self, text, media=None, mentions=None, not_before=None):
+        self.text = text
+        self.media = media
+        self.mentions = mentions
+        self.not_before = not_before
+
+# Function to parse an earliest-post time: a datetime, a Unix time, or an ISO 8601 string (naive means UTC)
+def parse_not_before(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+        except ValueError:
+            raise ContentError(f"invalid post time '{value}'")
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+# Function to build a content item from the raw values of a row
+def content_item(text, media=None, mentions=None, not_before=None):
+    if text is None or str(text).strip() == "":
+        raise ContentError("the tweet text is empty")
+    if isinstance(mentions, str):
+        mentions = tuple(handle for handle in re.split(r'[\s,]+', mentions) if handle) or None
+    elif mentions is not None:
+        mentions = tuple(str(handle) for handle in mentions)
+    if isinstance(media, str):
+        media = tuple(name.strip() for name in media.split(';') if name.strip()) or None
+    elif media:
+        media = tuple(str(name) for name in media)
+    return ContentItem(str(text), media or None, mentions, parse_not_before(not_before))
+
+# A tweet list: the number of tweets and random access to each of them by position.
+# Subclasses implement _row (the raw values of a row); rows are only parsed when they are used
+class ContentSource:
+    # A touched file is hashed first and only reopened if its content changed
+    hash_before_reopen = True
+    
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._version = None
+    
+    def __len__(self):
+        return self.count
+    
+    # Tweet at a position, raises ContentError if the row can't be used
+    def item(self, position):
+        if not 0 <= position < self.count:
+            raise IndexError(position)
+        return content_item(*self._row(position))
+    
+    # Number of the row as the user sees it in the file (for messages)
+    def row_number(self, position):
+        return position + 1
+    
+    # Remember the version of the file an index is built from (sources that read the file by offset)
+    def _remember_version(self, file):
+        stat = os.fstat(file.fileno())
+        self._version = (stat.st_mtime_ns, stat.st_size)
+    
+    # Make sure the file read from is still the version the index was built from
+    def _check_version(self, file):
+        stat = os.fstat(file.fileno())
+        if (stat.st_mtime_ns, stat.st_size) != self._version:
+            raise ContentChangedError(f"'{self.path}' changed since it was opened")
+    
+    # The file was touched but its content didn't change (load_content hashed it): accept its new
+    # (mtime, size) so reading it doesn't raise ContentChangedError
+    def accept_version(self, version):
+        if self._version is not None:
+            self._version = version
+    
+    def close(self):
+        pass
+
+# Function to map a header row to the positions of the tweet columns, None for missing optional columns
+def content_columns(header, text_column='Tweet'):
+    header = [str(name).strip() if name is not None else "" for name in header]
+    if text_column not in header:
+        raise ContentError(f"'{text_column}' column not found")
+    return tuple(header.index(name) if name in header else None
+                 for name in (text_column, MEDIA_COLUMN, MENTIONS_COLUMN, NOT_BEFORE_COLUMN))
+
+# Function to pick the tweet columns out of a row
+def row_values(row, columns):
+    return tuple(row[column] if column is not None and column < len(row) else None for column in columns)
+
+# Excel workbook, rows up to the first blank 'Tweet' cell. XLSX can't be read by position,
+# so the rows are streamed once into a list of raw values
+class XlsxContentSource(ContentSource):
+    def __init__(self, path):
+        from openpyxl import load_workbook
+        
+        super().__init__(path)
+        # Read-only mode streams rows instead of building the whole workbook in memory
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            columns = content_columns(next(rows, None) or ())
+            
+            self.rows = []
+            for row in rows:
+                values = row_values(row, columns)
+                if values[0] is None or values[0] == "":
+                    break
+                self.rows.append(values)
+        finally:
+            workbook.close()
+        self.count = len(self.rows)
+    
+    def _row(self, position):
+        return self.rows[position]
+    
+    def row_number(self, position):
+        # Row 1 is the header
+        return position + 2
+
+# CSV file with a 'Tweet' header, rows up to the first blank 'Tweet' cell (like Excel), indexed by
+# the byte offset of each record, so a row is read with one seek instead of keeping the file in memory.
+# Quoted fields may span lines: a record ends at the first line break after which the number of quote
+# characters is even.
+class CsvContentSource(ContentSource):
+    def __init__(self, path):
+        super().__init__(path)
+        self.offsets = array.array('Q')
+        with open(path, 'rb') as file:
+            self._remember_version(file)
+            header, offset = self._read_record(file, 0)
+            self.columns = content_columns(self._parse(header))
+            while True:
+                record, end = self._read_record(file, offset)
+                if not record:
+                    break
+                if record.strip():
+                    text = row_values(self._parse(record), self.columns)[0]
+                    if text is None or text.strip() == "":
+                        break
+                    self.offsets.append(offset)
+                offset = end
+        self.count = len(self.offsets)
+    
+    # Read the record starting at offset, returns its bytes and the offset of the next one
+    @staticmethod
+    def _read_record(file, offset):
+        file.seek(offset)
+        record = b''
+        while True:
+            line = file.readline()
+            record += line
+            if not line or record.count(b'"') % 2 == 0:
+                return record, offset + len(record)
+    
+    @staticmethod
+    def _parse(record):
+        return next(csv.reader([record.decode('utf-8-sig').rstrip('\r\n')]), [])
+    
+    def _row(self, position):
+        with open(self.path, 'rb') as file:
+            self._check_version(file)
+            record, _ = self._read_record(file, self.offsets[position])
+        return row_values(self._parse(record), self.columns)
+    
+    def row_number(self, position):
+        # Row 1 is the header
+        return position + 2
+
+# JSON Lines file: each line is a tweet string or an object with "text" and the optional
+# "media", "mentions" (list or string) and "not_before" keys; blank lines are skipped
+class JsonlContentSource(ContentSource):
+    def __init__(self, path):
+        super().__init__(path)
+        self.offsets = array.array('Q')
+        offset = 0
+        with open(path, 'rb') as file:
+            self._remember_version(file)
+            for line in file:
+                if line.strip():
+                    self.offsets.append(offset)
+                offset += len(line)
+        self.count = len(self.offsets)
+    
+    def _row(self, position):
+        with open(self.path, 'rb') as file:
+            self._check_version(file)
+            file.seek(self.offsets[position])
+            line = file.readline()
+        try:
+            value = json.loads(line)
+        except ValueError as e:
+            raise ContentError(f"invalid JSON: {e}")
+        if isinstance(value, str):
+            return (value,)
+        if not isinstance(value, dict):
+            raise ContentError("expected a string or an object")
+        return tuple(value.get(key) for key in ('text', 'media', 'mentions', 'not_before'))
+
+# SQLite database with a CONTENT_TABLE table: tweets are in rowid order and looked up by rowid,
+# so only the list of rowids is kept in memory
+class SqliteContentSource(ContentSource):
+    def __init__(self, path, table=CONTENT_TABLE):
+        super().__init__(path)
+        uri = f"file:{urllib.parse.quote(os.path.abspath(path))}?mode=ro"
+        self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+        try:
+            columns = [row[1] for row in self._conn.execute(f'PRAGMA table_info("{table}")')]
+            if 'text' not in columns:
+                raise ContentError(f"table '{table}' with a 'text' column not found")
+            selected = ", ".join(name if name in columns else "NULL" for name in ('text', 'media', 'mentions', 'not_before'))
+            self._query = f'SELECT {selected} FROM "{table}" WHERE rowid = ?'
+            self.rowids = array.array('q', (row[0] for row in self._conn.execute(f'SELECT rowid FROM "{table}" ORDER BY rowid')))
+        except Exception:
+            self._conn.close()
+            raise
+        self.count = len(self.rowids)
+    
+    def _row(self, position):
+        with self._lock:
+            row = self._conn.execute(self._query, (self.rowids[position],)).fetchone()
+        # Deleted since the rowids were read
+        if row is None:
+            raise ContentChangedError(f"'{self.path}' changed since it was opened")
+        return row
+    
+    def row_number(self, position):
+        return self.rowids[position]
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# Compiled tweet list (see compile_content): a 16-byte header (magic, byte order, row count),
+# row_count + 1 native uint64 offsets and one UTF-8 blob. Each row is its text, followed by
+# COMPILED_METADATA_SEPARATOR and a JSON object of its metadata if it has any.
+COMPILED_CONTENT_EXTENSION = ".tweets"
+COMPILED_CONTENT_MAGIC = b"TWTS"
+COMPILED_CONTENT_HEADER = struct.Struct('<4scxxxQ')
+COMPILED_METADATA_SEPARATOR = "\x1f"
+
+# Compiled tweet list, memory-mapped: opening it only reads the header, and row N is two offset
+# lookups and one slice of the map, so a million-row list loads instantly and the OS pages in
+# only the rows that are posted
+class CompiledContentSource(ContentSource):
+    # Opening is instant, so a touched file is simply reopened instead of hashed first
+    hash_before_reopen = False
+    
+    def __init__(self, path):
+        super().__init__(path)
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, byte_order, count = COMPILED_CONTENT_HEADER.unpack_from(self._map)
+            if magic != COMPILED_CONTENT_MAGIC:
+                raise ContentError("not a compiled tweet list")
+            if byte_order != sys.byteorder[0].encode():
+                raise ContentError("compiled on a machine with a different byte order, compile it again")
+            end = COMPILED_CONTENT_HEADER.size + (count + 1) * 8
+            self._offsets = memoryview(self._map)[COMPILED_CONTENT_HEADER.size:end].cast('Q')
+        except Exception:
+            self._map.close()
+            raise
+        self._blob_start = end
+        self._lock = threading.Lock()
+        self.count = count
+    
+    def _row(self, position):
+        with self._lock:
+            start = self._blob_start + self._offsets[position]
+            end = self._blob_start + self._offsets[position + 1]
+            record = self._map[start:end].decode('utf-8')
+        text, _, metadata = record.partition(COMPILED_METADATA_SEPARATOR)
+        if not metadata:
+            return (text,)
+        metadata = json.loads(metadata)
+        return (text, metadata.get('media'), metadata.get('mentions'), metadata.get('not_before'))
+    
+    def close(self):
+        with self._lock:
+            self._offsets.release()
+            self._map.close()
+
+# Tweet list formats by file extension
+CONTENT_SOURCES = {
+    '.xlsx': XlsxContentSource,
+    '.csv': CsvContentSource,
+    '.jsonl': JsonlContentSource,
+    '.ndjson': JsonlContentSource,
+    '.db': SqliteContentSource,
+    '.sqlite': SqliteContentSource,
+    '.sqlite3': SqliteContentSource,
+    COMPILED_CONTENT_EXTENSION: CompiledContentSource,
+}
+
+# Function to get the source class matching the extension of a tweet list
+def content_source_class(path):
+    source_class = CONTENT_SOURCES.get(os.path.splitext(path)[1].lower())
+    if source_class is None:
+        raise ContentError(f"unsupported tweet list format (use {', '.join(CONTENT_SOURCES)})")
+    return source_class
+
+# Function to open a tweet list with the source matching its extension
+def open_content_source(path):
+    return content_source_class(path)(path)
+
+# Opened tweet lists by file path, reopened only when the file content changes
+_content_cache = {}
+_content_cache_lock = threading.Lock()
+
+# Function to hash a file without reading it into memory at once
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Function to identify the current version of a tweet list (SQLite keeps recent writes in its -wal file)
+def content_stat_key(path):
+    keys = []
+    for name in (path, path + '-wal'):
+        try:
+            stat = os.stat(name)
+        except FileNotFoundError:
+            continue
+        keys.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(keys)
+
+# Function to load a tweet list, returns its ContentSource or None if it can't be read
+def load_content(path=None):
+    path = path or TWEETS_FILE
+    try:
+        # Check if the tweet list exists
+        if not os.path.exists(path):
+            log_message(f"⚠️ ERROR: '{path}' file not found. Please create it with your tweets.")
+            return None
+        
+        with _content_cache_lock:
+            cached = _content_cache.setdefault(path, {'stat': None, 'digest': None, 'source': None})
+            
+            # Same modification time and size: the open source is still current
+            stat_key = content_stat_key(path)
+            if stat_key != cached['stat']:
+                # The file was touched; only reopen it if its content actually changed
+                digest = file_digest(path) if content_source_class(path).hash_before_reopen else stat_key
+                if digest != cached['digest']:
+                    # The old source isn't closed: a post or the stager may still be reading from it.
+                    # It is released once the last of them is done with it
+                    cached['digest'] = digest
+                    cached['source'] = open_content_source(path)
+                else:
+                    cached['source'].accept_version(stat_key[0])
+                cached['stat'] = stat_key
+            
+            return cached['source']
+        
+    except ContentError as e:
+        log_message(f"⚠️ ERROR: '{path}': {e}")
+        return None
+    except Exception as e:
+        log_message(f"❌ Error loading tweets from '{path}': {e}")
+        return None
+
+# Twitter's weighted character counting (twitter-text v3): most Latin, Greek, Cyrillic, Hebrew, Arabic
+# and Indic text and common punctuation counts 1, everything else (CJK, most symbols) counts 2,
+# an emoji sequence counts 2 however many code points it has, and every URL counts 23
+TWEET_MAX_LENGTH = 280
+TWEET_URL_LENGTH = 23
+TWEET_TRUNCATION_SUFFIX = "..."
+
+# Top-level domains a link without http:// or www. has to end in to be shortened (the common ones of
+# the list twitter-text uses); longest first so the alternation tries 'com' before 'co'
+URL_TOP_LEVEL_DOMAINS = sorted((
+    'com', 'org', 'net', 'edu', 'gov', 'mil', 'int', 'info', 'biz', 'name', 'pro', 'io', 'co', 'ai', 'app', 'dev',
+    'me', 'tv', 'ly', 'gg', 'fm', 'so', 'to', 'xyz', 'online', 'site', 'tech', 'store', 'blog', 'news', 'live',
+    'us', 'uk', 'ca', 'au', 'nz', 'ie', 'de', 'fr', 'es', 'it', 'nl', 'be', 'ch', 'at', 'se', 'no', 'dk', 'fi',
+    'pl', 'pt', 'ru', 'ua', 'eu', 'jp', 'cn', 'kr', 'in', 'sg', 'br', 'mx', 'ar', 'za', 'ng', 'ke'
+), key=len, reverse=True)
+TOP_LEVEL_DOMAIN = r'\.(?i:' + '|'.join(URL_TOP_LEVEL_DOMAINS) + r')(?![\w-])'
+
+# URLs as Twitter shortens them (trailing punctuation isn't part of the link): links starting with http(s):// or www.,
+# and bare domains with a known top-level domain and an optional path that aren't part of a word, handle or email address
+URL_PATTERN = re.compile(r'(?:https?://|www\.)[^\s]*[^\s.,!?;:)\]}\'"]')
+BARE_DOMAIN_PATTERN = re.compile(
+    r'(?<![\w@.-])(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]*[a-zA-Z0-9])?\.)*[a-zA-Z0-9](?:[a-zA-Z0-9-]*[a-zA-Z0-9])?' + TOP_LEVEL_DOMAIN +
+    r'(?:[/?#](?:[^\s]*[^\s.,!?;:)\]}\'"])?)?'
+)
+TOP_LEVEL_DOMAIN_HINT = re.compile(TOP_LEVEL_DOMAIN)
+DOMAIN_CHARACTERS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.-')
+
+WHITESPACE = re.compile(r'\s+')
+
+# Any character outside the ranges that count 1; text without one is measured with len()
+HEAVY_CHARACTER = re.compile('[^\u0000-\u10ff\u2000-\u200d\u2010-\u201f\u2032-\u2037]')
+
+# Emoji sequences that count 2 as a whole: flags, keycaps, and pictographs (or characters in emoji style)
+# with their skin tones, variation selectors, tags and ZWJ-joined parts
+EMOJI_SEQUENCE = re.compile(
+    '[\U0001f1e6-\U0001f1ff]{2}'
+    '|[0-9#*]\ufe0f?\u20e3'
+    '|(?:[\U0001f000-\U0001faff\u2300-\u23ff\u2600-\u27bf\u2b00-\u2bff]|.\ufe0f)'
+    '[\ufe0e\ufe0f\U0001f3fb-\U0001f3ff\U000e0020-\U000e007f]*'
+    '(?:\u200d.[\ufe0e\ufe0f\U0001f3fb-\U0001f3ff]*)*'
+)
+
+# Function to find the URLs in text as (start, end) spans in order. Trying bare domains at every position
+# is slow, so BARE_DOMAIN_PATTERN is only tried at the start of the word around each known top-level domain
+def url_spans(text):
+    spans = [match.span() for match in URL_PATTERN.finditer(text)]
+    for hint in TOP_LEVEL_DOMAIN_HINT.finditer(text):
+        if any(start <= hint.start() < end for start, end in spans):
+            continue
+        start = hint.start()
+        while start > 0 and text[start - 1] in DOMAIN_CHARACTERS:
+            start -= 1
+        match = BARE_DOMAIN_PATTERN.match(text, start)
+        if match:
+            spans.append(match.span())
+    
+    # The leftmost URL wins where two overlap (a bare domain whose path holds an http:// link)
+    urls = []
+    for span in sorted(spans):
+        if not urls or span[0] >= urls[-1][1]:
+            urls.append(span)
+    return urls
+
+# Function to get the weight of one code point
+def character_weight(code):
+    if code <= 0x10FF or 0x2000 <= code <= 0x200D or 0x2010 <= code <= 0x201F or 0x2032 <= code <= 0x2037:
+        return 1
+    return 2
+
+# Function to check whether a grapheme cluster is an emoji (pictographs, flags, keycaps, emoji-style symbols)
+def is_emoji_cluster(cluster):
+    code = ord(cluster[0])
+    if 0x1F000 <= code <= 0x1FAFF or 0x2300 <= code <= 0x23FF or 0x2600 <= code <= 0x27BF or 0x2B00 <= code <= 0x2BFF:
+        return True
+    return len(cluster) > 1 and ('\ufe0f' in cluster or '\u20e3' in cluster)
+
+# Function to split text into grapheme clusters with their weights: a character plus its combining marks,
+# variation selectors, skin tones, tags and ZWJ-joined characters, or a pair of regional indicators (a flag)
+def grapheme_clusters(text):
+    index = 0
+    end = len(text)
+    while index < end:
+        start = index
+        code = ord(text[index])
+        index += 1
+        if 0x1F1E6 <= code <= 0x1F1FF and index < end and 0x1F1E6 <= ord(text[index]) <= 0x1F1FF:
+            index += 1
+        while index < end:
+            code = ord(text[index])
+            if code == 0x200D and index + 1 < end:
+                index += 2
+            elif 0xFE00 <= code <= 0xFE0F or 0x1F3FB <= code <= 0x1F3FF or 0xE0020 <= code <= 0xE007F or code == 0x20E3 or unicodedata.category(text[index])[0] == 'M':
+                index += 1
+            else:
+                break
+        cluster = text[start:index]
+        if is_emoji_cluster(cluster):
+            yield cluster, 2
+        else:
+            yield cluster, sum(character_weight(ord(character)) for character in cluster)
+
+# Function to split text into the pieces truncation may not cut through (URLs and grapheme clusters) with their weights
+def tweet_atoms(text):
+    position = 0
+    for start, end in url_spans(text):
+        yield from grapheme_clusters(text[position:start])
+        yield text[start:end], TWEET_URL_LENGTH
+        position = end
+    yield from grapheme_clusters(text[position:])
+
+# Function to get the weighted length of text without URLs: each character counts 1 plus 1 more if it is heavy,
+# after every emoji sequence has been replaced by one heavy character (all done by the regex engine)
+def segment_length(text):
+    if not HEAVY_CHARACTER.search(text):
+        return len(text)
+    text = EMOJI_SEQUENCE.sub('\u3007', text)
+    return len(text) + len(HEAVY_CHARACTER.findall(text))
+
+# Function to get the length Twitter counts for a tweet
+def tweet_length(text):
+    text = unicodedata.normalize('NFC', text)
+    length = segment_length(text)
+    
+    # Measure the whole text once, then swap each URL's own length for the fixed URL length
+    for start, end in url_spans(text):
+        length += TWEET_URL_LENGTH - segment_length(text[start:end])
+    return length
+
+# Function to shorten text to at most max_length weighted characters, cutting at a word boundary
+# when that keeps at least half of the room, and never inside a URL or grapheme cluster
+def truncate_text(text, max_length):
+    text = unicodedata.normalize('NFC', text)
+    if tweet_length(text) <= max_length:
+        return text
+    
+    # Longest run of whole words that fits (whitespace is never inside a URL or cluster). In a copy where
+    # every URL is 23 characters and every emoji sequence or heavy character is 2, the n-th whitespace run
+    # starts at the weighted length of the text before it, so no prefix has to be measured on its own
+    pieces = []
+    position = 0
+    for start, end in url_spans(text):
+        pieces.append(text[position:start])
+        pieces.append('u' * TWEET_URL_LENGTH)
+        position = end
+    pieces.append(text[position:])
+    weighted = HEAVY_CHARACTER.sub('hh', EMOJI_SEQUENCE.sub('\u3007', "".join(pieces)))
+    cuts = [match.start() for match in WHITESPACE.finditer(text)]
+    lengths = [match.start() for match in WHITESPACE.finditer(weighted)]
+    if len(cuts) == len(lengths):
+        fitting = bisect.bisect_right(lengths, max_length)
+        if fitting and lengths[fitting - 1] * 2 >= max_length:
+            return text[:cuts[fitting - 1]].rstrip()
+    
+    # No usable word boundary: cut between grapheme clusters
+    used = 0
+    pieces = []
+    for piece, weight in tweet_atoms(text):
+        if used + weight > max_length:
+            break
+        used += weight
+        pieces.append(piece)
+    return "".join(pieces).rstrip()
+
+# Function to build the text of a tweet from its content and mentions, truncating the content to fit
+# Twitter's weighted length limit; returns None if the mentions leave no room for the content
+def compose_tweet(content, mentions="", mentions_length=0):
+    if not mentions:
+        if tweet_length(content) <= TWEET_MAX_LENGTH:
+            return content
+        truncated = truncate_text(content, TWEET_MAX_LENGTH - len(TWEET_TRUNCATION_SUFFIX))
+        return f"{truncated}{TWEET_TRUNCATION_SUFFIX}" if truncated else None
+    
+    if tweet_length(content) + 2 + mentions_length <= TWEET_MAX_LENGTH:
+        return f"{content}\n\n{mentions}"
+    
+    # Truncate tweet if needed
+    budget = TWEET_MAX_LENGTH - mentions_length - len(TWEET_TRUNCATION_SUFFIX) - 1
+    truncated = truncate_text(content, budget) if budget > 0 else ""
+    if not truncated:
+        return None
+    tweet = f"{truncated}{TWEET_TRUNCATION_SUFFIX}\n{mentions}"
+    return tweet if tweet_length(tweet) <= TWEET_MAX_LENGTH else None
+
+# ✅ List of influencers (Twitter handles without '@')
+influencers = [
+    "Edutopia", "TeachThought", "ClassTechTips", "web20classroom", "ShakeUpLearning", "rmbyrne", "ShellTerrell", "gcouros", "coolcatteacher", "MsMagiera", "courosa", "tvanderark", "audreywatters", "lesliefisher", "mrkempnz", "DNLee5", "eveewing", "thesiswhisperer", "AmyJoMartin", "GRwabigwi", "BiscottiNicole", "cultofpedagogy", "Larryferlazzo", "cpappas", "lauraoverton", "DonaldHTaylor", "CatMoore", "Josh_Bersin", "emasie", "brewerhm", "burgessdave", "BethHouf", "JayBilly2", "drmaryhemphill", "ERobbPrincipal", "shfarnsworth", "joboaler", "EduColorMVMT", "douglemov", "Tcea", "EdSurge", "ISTE", "MindShiftKQED", "HollyClarkEdu", "alicekeeler", "tonyvincent", "mattmiller", "jmattmiller", "jeffudall", "curriki"
+
+]
+
+# ✅ Path to the folder containing images/videos
+media_folder = "media"
+
+# 'ftyp' major brands of MP4 video files
+MP4_VIDEO_BRANDS = {b'isom', b'iso2', b'iso4', b'iso5', b'iso6', b'mp41', b'mp42', b'avc1', b'M4V ', b'M4VH', b'M4VP', b'dash', b'MSNV', b'3gp4', b'3gp5', b'3gp6', b'3g2a', b'f4v '}
+
+# Function to sniff the media type of a file from its first bytes, returns None for anything that isn't supported media
+def sniff_media_type(media_path):
+    with open(media_path, 'rb') as file:
+        header = file.read(16)
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if header.startswith((b'GIF87a', b'GIF89a')):
+        return 'image/gif'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'image/webp'
+    # ISO base media file: the 'ftyp' box's major brand tells QuickTime and MP4 video apart from the
+    # other formats using the same container (HEIC/AVIF images, M4A audio), which aren't supported
+    if header[4:8] == b'ftyp':
+        if header[8:12] == b'qt  ':
+            return 'video/quicktime'
+        if header[8:12] in MP4_VIDEO_BRANDS:
+            return 'video/mp4'
+    return None
+
+# Sniffed media types by (path, modification time, size), so an unchanged file is only read once
+_media_types = {}
+_media_types_lock = threading.Lock()
+
+# Function to get the media type of a file (sniffed from its content, not its extension)
+def media_type_of(media_path):
+    stat = os.stat(media_path)
+    key = (os.path.abspath(media_path), stat.st_mtime_ns, stat.st_size)
+    with _media_types_lock:
+        if key in _media_types:
+            return _media_types[key]
+    media_type = sniff_media_type(media_path)
+    with _media_types_lock:
+        _media_types[key] = media_type
+    return media_type
+
+# Function to read a video's duration in seconds from its 'mvhd' box, returns None if it can't be found
+# (only box headers are read; the media data is skipped over)
+def video_duration(media_path):
+    def find_box(file, wanted, end):
+        while file.tell() + 8 <= end:
+            start = file.tell()
+            size, box_type = struct.unpack('>I4s', file.read(8))
+            if size == 1:
+                size = struct.unpack('>Q', file.read(8))[0]
+            elif size == 0:
+                size = end - start
+            if size < 8:
+                return None
+            if box_type == wanted:
+                return start + size
+            file.seek(start + size)
+        return None
+    
+    try:
+        with open(media_path, 'rb') as file:
+            moov_end = find_box(file, b'moov', os.fstat(file.fileno()).st_size)
+            if moov_end is None or find_box(file, b'mvhd', moov_end) is None:
+                return None
+            version = file.read(4)[0]
+            if version == 1:
+                _, _, timescale, duration = struct.unpack('>QQIQ', file.read(28))
+            else:
+                _, _, timescale, duration = struct.unpack('>IIII', file.read(16))
+            return duration / timescale if timescale else None
+    except (OSError, struct.error, IndexError):
+        return None
+
+# One file of a media folder, with everything posting needs to know about it
+class MediaFile:
+    __slots__ = ('name', 'path', 'size', 'mtime_ns', 'media_type', 'duration')
+    
+    def __init__(self, name, path, size, mtime_ns, media_type, duration=None):
+        self.name = name
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.media_type = media_type
+        self.duration = duration
+    
+    # Content hash (computed on first use and remembered while the file is unchanged)
+    @property
+    def digest(self):
+        return media_file_digest(self.path)
+
+# Live index of a media folder: refreshed when the folder's modification time changes (files were added,
+# removed or renamed), and only new or changed files are sniffed, so picking media never rescans the folder
+class MediaIndex:
+    def __init__(self, folder):
+        self.folder = folder
+        self._entries = {}
+        self._files = []
+        self._mtime_ns = None
+        self._lock = threading.Lock()
+    
+    # Rescan the folder if it changed since the last scan
+    def refresh(self):
+        try:
+            mtime_ns = os.stat(self.folder).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        with self._lock:
+            if mtime_ns == self._mtime_ns:
+                return False
+            
+            entries = {}
+            if mtime_ns is not None:
+                with os.scandir(self.folder) as scan:
+                    for item in scan:
+                        if item.name.startswith('.') or not item.is_file():
+                            continue
+                        stat = item.stat()
+                        known = self._entries.get(item.name)
+                        if known and known.size == stat.st_size and known.mtime_ns == stat.st_mtime_ns:
+                            entries[item.name] = known
+                            continue
+                        try:
+                            media_type = media_type_of(item.path)
+                        except OSError:
+                            continue
+                        if media_type is None:
+                            continue
+                        duration = video_duration(item.path) if media_type.startswith('video') else None
+                        entries[item.name] = MediaFile(item.name, item.path, stat.st_size, stat.st_mtime_ns, media_type, duration)
+            
+            added = len(entries.keys() - self._entries.keys())
+            removed = len(self._entries.keys() - entries.keys())
+            if self._mtime_ns is not None and (added or removed):
+                log_message(f"📂 Media folder '{self.folder}' changed: {added} added, {removed} removed, {len(entries)} files")
+            self._entries = entries
+            self._files = [entries[name] for name in sorted(entries)]
+            self._mtime_ns = mtime_ns
+            return True
+    
+    # Current media files, in name order
+    def files(self):
+        self.refresh()
+        return self._files
+    
+    def names(self):
+        return [media.name for media in self.files()]
+
+# One index per media folder, shared by every account that uses the folder
+_media_indexes = {}
+_media_indexes_lock = threading.Lock()
+
+# Function to get the index of a media folder
+def media_index_for(folder):
+    with _media_indexes_lock:
+        index = _media_indexes.get(folder)
+        if index is None:
+            index = _media_indexes[folder] = MediaIndex(folder)
+        return index
+
+# Function to list the media files of a folder, returns None if the bot cannot run without more media
+def load_media_files(folder=media_folder):
+    # ✅ Ensure media folder exists
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+        log_message(f"📂 '{folder}' folder created. Add media files and rerun the script.")
+        return None
+    
+    # ✅ Get list of media files (JPEG, PNG, GIF, WebP, MP4 and MOV, recognized by their content)
+    files = media_index_for(folder).names()
+    
+    # ✅ Ensure there are at least 4 media files
+    if len(files) < 4:
+        log_message(f"⚠️ ERROR: Please add at least 4 media files to the '{folder}' folder before running the script.")
+        return None
+    
+    return files
+
+# Optional influencer list file (one handle per line, '#' starts a comment); replaces the list above when it exists
+INFLUENCERS_FILE = "influencers.txt"
+
+# Number of influencers mentioned in each tweet
+MENTIONS_PER_POST = 10
+
+# Number of media files the media rotation attaches to each tweet (1-4; a video or GIF is always posted alone)
+MEDIA_PER_POST = 1
+
+# Twitter handles are 1-15 letters, digits or underscores
+HANDLE_PATTERN = re.compile(r'^[A-Za-z0-9_]{1,15}$')
+
+# Function to load influencer handles from a file, returns None if the file can't be read
+def load_influencers(path=INFLUENCERS_FILE):
+    try:
+        with open(path, encoding='utf-8') as file:
+            handles = [line.split('#', 1)[0].strip() for line in file]
+    except OSError as e:
+        log_message(f"❌ Error loading influencers from '{path}': {e}")
+        return None
+    return [handle for handle in handles if handle]
+
+# Function to normalize handles: strips '@' and whitespace, drops invalid handles and
+# case-insensitive duplicates (Twitter handles are case-insensitive), keeps the original order
+def normalize_handles(handles):
+    normalized = []
+    seen = set()
+    invalid = []
+    for handle in handles:
+        handle = str(handle).strip().lstrip('@')
+        if not HANDLE_PATTERN.match(handle):
+            invalid.append(handle)
+            continue
+        key = handle.lower()
+        if key not in seen:
+            seen.add(key)
+            normalized.append(handle)
+    if invalid:
+        log_message(f"⚠️ Skipped {len(invalid)} invalid influencer handles: {', '.join(invalid[:10])}{' ...' if len(invalid) > 10 else ''}")
+    return normalized
+
+# Precomputed mention strings: post i mentions the per_post handles starting at (i * per_post) % n,
+# wrapping around, so the sequence repeats every n / gcd(n, per_post) posts and each post is a table lookup
+class MentionRotation:
+    def __init__(self, handles, per_post=MENTIONS_PER_POST):
+        self.handles = normalize_handles(handles)
+        count = len(self.handles)
+        self.per_post = min(per_post, count)
+        self.period = count // math.gcd(count, self.per_post) if self.per_post else 1
+        
+        # Tags with the first per_post repeated at the end, so a wrapping window is one slice
+        tags = [f"@{handle}" for handle in self.handles]
+        tags += tags[:self.per_post]
+        self.table = []
+        for position in range(self.period):
+            start = (position * self.per_post) % count if count else 0
+            mentions = " ".join(tags[start:start + self.per_post])
+            # Handles are ASCII, so every character of a mention string counts once towards the tweet length
+            self.table.append((mentions, len(mentions)))
+    
+    # Mention string and its length for a post
+    def mentions_for(self, post_index):
+        return self.table[post_index % self.period]
+
+# Function to get the influencer list of accounts that don't have their own (INFLUENCERS_FILE or the list above)
+def default_influencers():
+    return influencers
+
+# Accounts with the same influencer list share one rotation table
+@functools.lru_cache(maxsize=None)
+def mention_rotation(handles, per_post=MENTIONS_PER_POST):
+    return MentionRotation(handles, per_post)
+
+# Mention string and its length for a row that names its own handles (all of them, in order)
+@functools.lru_cache(maxsize=1024)
+def row_mentions(handles):
+    return MentionRotation(handles, len(handles)).mentions_for(0)
+
+# Optional multi-account configuration; without it the bot posts for the single account in .env
+ACCOUNTS_FILE = "accounts.json"
+
+# Number of accounts that can be posting at the same moment
+ACCOUNT_WORKERS = 8
+
+# One Twitter account with its own credentials, content, media, mentions and schedule.
+# All accounts share the process, the HTTP connection pool and the logger.
+class Account:
+    def __init__(self, name, signer, tweets_file=None, media_folder=media_folder, influencers=None, mentions_per_post=MENTIONS_PER_POST, media_per_post=MEDIA_PER_POST, post_times=None, log_prefix=""):
+        self.name = name
+        self.signer = signer
+        self.tweets_file = tweets_file or TWEETS_FILE
+        self.media_folder = media_folder
+        self.media_per_post = max(1, min(media_per_post, MAX_MEDIA_PER_TWEET))
+        
+        # Normalized once; posts just look up their mention string
+        self.mentions = mention_rotation(tuple(influencers if influencers is not None else default_influencers()), mentions_per_post)
+        self.influencers = self.mentions.handles
+        self.post_times = post_times or select_post_times(POSTS_PER_DAY)
+        self.log_prefix = log_prefix
+        
+        # Track current position in tweet list
+        self.current_tweet_index = 0
+        self.total_tweets = 0
+        
+        # Only one post per account runs at a time, even if two slots come due together
+        self.lock = threading.Lock()
+    
+    # Media files currently in the account's folder (kept up to date without restarting)
+    @property
+    def media(self):
+        return media_index_for(self.media_folder).files()
+    
+    @property
+    def media_files(self):
+        return [media.name for media in self.media]
+
+# The account configured in .env (set by load_config)
+default_account = None
+
+# Function to resolve a credential from accounts.json ("$NAME" reads environment variable NAME)
+def resolve_credential(value):
+    if isinstance(value, str) and value.startswith('$'):
+        return os.getenv(value[1:])
+    return value
+
+# Function to load the accounts to post for, from ACCOUNTS_FILE if it exists
+#
+# accounts.json looks like:
+# {"accounts": [{"name": "edu", "api_key": "$EDU_API_KEY", "api_secret": "$EDU_API_SECRET",
+#                "access_token": "$EDU_ACCESS_TOKEN", "access_secret": "$EDU_ACCESS_SECRET",
+#                "tweets_file": "edu_tweets.xlsx", "media_folder": "media/edu",
+#                "influencers": ["Edutopia", "ISTE"], "posts_per_day": 6}]}
+# Every key except the credentials is optional; "post_times" can replace "posts_per_day",
+# "influencers_file" can replace "influencers", "mentions_per_post" sets the mentions per tweet
+# and "media_per_post" the media files per tweet.
+def load_accounts():
+    if not os.path.exists(ACCOUNTS_FILE):
+        return [default_account]
+    
+    try:
+        with open(ACCOUNTS_FILE, encoding='utf-8') as file:
+            config = json.load(file)
+    except Exception as e:
+        log_message(f"❌ Error loading '{ACCOUNTS_FILE}': {e}")
+        return []
+    
+    accounts = []
+    for index, entry in enumerate(config.get('accounts', [])):
+        name = entry.get('name') or f"account{index + 1}"
+        signer = OAuth1Signer(
+            resolve_credential(entry.get('api_key')),
+            resolve_credential(entry.get('api_secret')),
+            resolve_credential(entry.get('access_token')),
+            resolve_credential(entry.get('access_secret'))
+        )
+        post_times = entry.get('post_times') or select_post_times(entry.get('posts_per_day', POSTS_PER_DAY))
+        account_influencers = entry.get('influencers')
+        if entry.get('influencers_file'):
+            account_influencers = load_influencers(entry['influencers_file'])
+            if account_influencers is None:
+                continue
+        accounts.append(Account(
+            name,
+            signer,
+            tweets_file=entry.get('tweets_file'),
+            media_folder=entry.get('media_folder', media_folder),
+            influencers=account_influencers,
+            mentions_per_post=entry.get('mentions_per_post', MENTIONS_PER_POST),
+            media_per_post=entry.get('media_per_post', MEDIA_PER_POST),
+            post_times=post_times,
+            log_prefix=f"[{name}] "
+        ))
+    
+    log_message(f"👥 Loaded {len(accounts)} accounts from '{ACCOUNTS_FILE}'")
+    return accounts
+
+# Journal entries kept per account when the journal is compacted on startup
+JOURNAL_KEEP_ENTRIES = 10000
+
+# Crash-safe posting journal: every attempt (tweet index, media ID, tweet ID, outcome) is written
+# to SQLite in WAL mode before and after each network step, and a one-row-per-account progress
+# table makes resuming an O(1) lookup however long the history gets
+class PostJournal:
+    def __init__(self, path=STATE_DB_FILE):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+    
+    # Open the database on first use (importing the module never touches the disk)
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")  # fsync every commit, so a crash never loses a recorded post
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS attempts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    account TEXT NOT NULL,
+                    tweet_index INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    media_id TEXT,
+                    tweet_id TEXT,
+                    error TEXT,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS attempts_by_account ON attempts (account, id);
+                CREATE TABLE IF NOT EXISTS progress (
+                    account TEXT PRIMARY KEY,
+                    next_index INTEGER NOT NULL,
+                    open_attempt INTEGER
+                );
+            """)
+            self._conn = conn
+        return self._conn
+    
+    # Run statements in one transaction
+    def _write(self, statements):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                results = [conn.execute(sql, args) for sql, args in statements]
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return results
+    
+    # Record the start of an attempt to post tweet_index and return its ID
+    def begin(self, account_name, tweet_index):
+        cursor, _ = self._write([
+            ("INSERT INTO attempts (account, tweet_index, status, updated_at) VALUES (?, ?, 'started', ?)",
+             (account_name, tweet_index, time.time())),
+            ("INSERT INTO progress (account, next_index, open_attempt) VALUES (?, ?, last_insert_rowid()) "
+             "ON CONFLICT (account) DO UPDATE SET open_attempt = excluded.open_attempt",
+             (account_name, tweet_index))
+        ])
+        return cursor.lastrowid
+    
+    # Record progress within an attempt ('posting' once its media is uploaded, just before the create-tweet call)
+    def update(self, attempt_id, status, media_id=None):
+        self._write([
+            ("UPDATE attempts SET status = ?, media_id = COALESCE(?, media_id), updated_at = ? WHERE id = ?",
+             (status, media_id, time.time(), attempt_id))
+        ])
+    
+    # Close an attempt ('posted' or 'failed') and move the account on to next_index
+    def finish(self, account_name, attempt_id, status, next_index, tweet_id=None, error=None):
+        self._write([
+            ("UPDATE attempts SET status = ?, tweet_id = ?, error = ?, updated_at = ? WHERE id = ?",
+             (status, tweet_id, error, time.time(), attempt_id)),
+            ("UPDATE progress SET next_index = ?, open_attempt = NULL WHERE account = ?",
+             (next_index, account_name))
+        ])
+    
+    # Find where an account left off; an attempt interrupted by a crash is settled here:
+    # - not yet at the create-tweet call: nothing went out, so the same tweet is tried again
+    #   (media it already uploaded is reused from media_cache, which records each ID as its upload ends)
+    # - inside the create-tweet call: it may have been posted, so it is skipped to avoid a duplicate
+    def resume(self, account_name):
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT next_index, open_attempt FROM progress WHERE account = ?", (account_name,)).fetchone()
+            attempt = None
+            if row and row[1] is not None:
+                attempt = conn.execute("SELECT tweet_index, status FROM attempts WHERE id = ?", (row[1],)).fetchone()
+        
+        if not row:
+            return 0
+        next_index, open_attempt = row
+        if open_attempt is None or attempt is None:
+            return next_index
+        
+        tweet_index, status = attempt
+        if status == 'posting':
+            log_message(f"⚠️ Tweet {tweet_index+1} was being posted when the bot stopped; skipping it to avoid a duplicate.")
+            self.finish(account_name, open_attempt, 'unknown', tweet_index + 1, error="interrupted during create-tweet call")
+            return tweet_index + 1
+        
+        log_message(f"🔄 Tweet {tweet_index+1} was interrupted before posting; it will be tried again.")
+        self.finish(account_name, open_attempt, 'interrupted', tweet_index, error=f"interrupted while {status}")
+        return tweet_index
+    
+    # Drop all but the newest keep entries of every account and shrink the WAL file
+    def compact(self, keep=JOURNAL_KEEP_ENTRIES):
+        with self._lock:
+            conn = self._connection()
+            removed = conn.execute("""
+                DELETE FROM attempts
+                WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (PARTITION BY account ORDER BY id DESC) AS position
+                        FROM attempts
+                    ) WHERE position > ?
+                )
+                  AND id NOT IN (SELECT open_attempt FROM progress WHERE open_attempt IS NOT NULL)
+            """, (keep,)).rowcount
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+    
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+post_journal = PostJournal()
+
+# Function to pick the media files for a tweet index: the row's own media, otherwise the next
+# media_per_post files of the folder's rotation. A video or GIF is posted alone and a run
+# of images stops before one, as Twitter doesn't mix them in a tweet
+def media_paths_for(account, tweet_index, item=None):
+    if item is not None and item.media:
+        return [os.path.join(account.media_folder, name) for name in item.media]
+    files = account.media
+    if not files:
+        raise FileNotFoundError(f"No media files left in '{account.media_folder}'")
+    
+    start = tweet_index * account.media_per_post
+    group = [files[(start + offset) % len(files)] for offset in range(min(account.media_per_post, len(files)))]
+    if not is_still_image(group[0].media_type):
+        return [group[0].path]
+    return [media.path for media in itertools.takewhile(lambda media: is_still_image(media.media_type), group)]
+
+# Function to tell images that can share a tweet (JPEG, PNG, WebP) from videos and GIFs, which can't
+def is_still_image(media_type):
+    return media_type is not None and media_type.startswith('image/') and media_type != 'image/gif'
+
+# Function to check that a set of media files can go into one tweet, returns a problem description or None
+# (unreadable files are left to the upload, or to check_media_file in the dry run)
+def check_media_group(media_paths):
+    if len(media_paths) > MAX_MEDIA_PER_TWEET:
+        return f"{len(media_paths)} media files (a tweet takes at most {MAX_MEDIA_PER_TWEET} images)"
+    if len(media_paths) > 1:
+        for media_path in media_paths:
+            try:
+                media_type = media_type_of(media_path)
+            except OSError:
+                continue
+            if media_type is not None and not is_still_image(media_type):
+                return f"{media_path} is a video or GIF, which must be the only media of a tweet"
+    return None
+
+# Number of upcoming posts per account whose media is uploaded ahead of their slot
+STAGE_AHEAD_POSTS = 2
+
+# Number of background threads uploading staged media
+MEDIA_STAGE_WORKERS = 2
+
+# Look-ahead stage: uploads (and waits for processing of) the media of each account's next
+# posts in the background, so at post time upload_media is a media cache hit and only the
+# create-tweet request runs in the slot
+class MediaStager:
+    def __init__(self, ahead=STAGE_AHEAD_POSTS, workers=MEDIA_STAGE_WORKERS):
+        self.ahead = ahead
+        self.workers = workers
+        self._executor = None
+        self._in_flight = set()
+        self._lock = threading.Lock()
+    
+    # Queue the media of the account's next posts for upload
+    def stage(self, account):
+        if not account.media_files or self.ahead <= 0:
+            return
+        
+        content = load_content(account.tweets_file)
+        if not content:
+            return
+        for offset in range(self.ahead):
+            tweet_index = account.current_tweet_index + offset
+            media_paths = self._postable_media(account, content, tweet_index)
+            for media_path in media_paths:
+                key = (account.name, media_path)
+                with self._lock:
+                    if key in self._in_flight:
+                        continue
+                    self._in_flight.add(key)
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="stage")
+                    self._executor.submit(self._upload, account, media_path, key)
+    
+    # Media of a look-ahead post, or nothing if post_tweet is going to skip or hold back that post
+    # (unusable row, not due yet, too long, media that can't go into one tweet, recent duplicate)
+    @staticmethod
+    def _postable_media(account, content, tweet_index):
+        try:
+            item = content.item(tweet_index % len(content))
+            if item.not_before and item.not_before > time.time():
+                return []
+            final_tweet, media_paths = compose_post(account, item, tweet_index)
+            if final_tweet is None or check_media_group(media_paths):
+                return []
+            if duplicate_index.find(account.name, final_tweet):
+                return []
+        except (ContentError, OSError):
+            return []
+        return media_paths
+    
+    def _upload(self, account, media_path, key):
+        try:
+            # Only the transfer happens on this worker; video processing is left to the shared poller
+            run_with_log_prefix(account.log_prefix, request_media_upload, media_path, account)
+        except Exception as e:
+            log_message(f"❌ {account.log_prefix}Staging {media_path} failed: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(key)
+    
+    def shutdown(self):
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+media_stager = MediaStager()
+
+# Duplicate content detection
+DUPLICATE_WINDOW_DAYS = 30  # Content posted within this many days is not posted again
+NEAR_DUPLICATE_THRESHOLD = 0.8  # Estimated word-pair overlap from which a tweet counts as a near-duplicate
+DUPLICATE_SKIP_LIMIT = 20  # Rows one slot may skip as duplicates before it gives up until the next slot
+MINHASH_BANDS = 16  # MinHash signature = MINHASH_BANDS bands of MINHASH_ROWS values each
+MINHASH_ROWS = 4
+
+# Large prime for the MinHash permutations, and the fixed random permutations themselves
+MINHASH_PRIME = (1 << 61) - 1
+_minhash_random = random.Random(20240601)
+MINHASH_PERMUTATIONS = [(_minhash_random.randrange(1, MINHASH_PRIME), _minhash_random.randrange(MINHASH_PRIME))
+                        for _ in range(MINHASH_BANDS * MINHASH_ROWS)]
+
+# Mentions rotate between posts, so they are left out when comparing content
+MENTION_PATTERN = re.compile(r'(?<!\w)@\w{1,15}')
+
+# Function to normalize tweet text for duplicate detection (no mentions, case or spacing differences)
+def normalize_tweet_text(text):
+    text = MENTION_PATTERN.sub(' ', unicodedata.normalize('NFC', text))
+    return " ".join(text.casefold().split())
+
+# Function to get the MinHash signature of normalized text, over its word pairs (or single words for one-word texts)
+def minhash_signature(normalized):
+    words = normalized.split()
+    shingles = {" ".join(words[index:index + 2]) for index in range(max(len(words) - 1, 1))}
+    hashes = [int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big') for shingle in shingles]
+    return array.array('Q', [min((a * value + b) % MINHASH_PRIME for value in hashes) for a, b in MINHASH_PERMUTATIONS])
+
+# Function to get the LSH bucket of each band of a signature; similar texts share at least one bucket
+def minhash_buckets(signature):
+    buckets = []
+    for band in range(MINHASH_BANDS):
+        rows = signature[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS].tobytes()
+        buckets.append(int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), 'big', signed=True))
+    return buckets
+
+# Function to estimate the word-pair overlap of two texts from their MinHash signatures
+def minhash_similarity(signature, other):
+    return sum(1 for mine, theirs in zip(signature, other) if mine == theirs) / len(signature)
+
+# Persistent index of posted content: an exact hash of the normalized text plus MinHash LSH buckets
+# for near-duplicates, both answered with indexed lookups before any media is uploaded. Media is left
+# out: Twitter rejects the same text again whatever media it comes with
+class DuplicateIndex:
+    def __init__(self, path=STATE_DB_FILE, window_days=DUPLICATE_WINDOW_DAYS, threshold=NEAR_DUPLICATE_THRESHOLD):
+        self.path = path
+        self.window_days = window_days
+        self.threshold = threshold
+        self._conn = None
+        self._lock = threading.Lock()
+    
+    # Open the database on first use (importing the module never touches the disk)
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS posted_content (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    account TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    signature BLOB NOT NULL,
+                    tweet_id TEXT,
+                    posted_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS posted_content_hash ON posted_content (account, content_hash);
+                CREATE TABLE IF NOT EXISTS posted_buckets (
+                    account TEXT NOT NULL,
+                    band INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    content_id INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS posted_buckets_lookup ON posted_buckets (account, band, bucket);
+            """)
+            self._conn = conn
+        return self._conn
+    
+    @staticmethod
+    def content_hash(normalized):
+        return hashlib.sha256(normalized.encode()).hexdigest()
+    
+    # Find recently posted content this tweet repeats; returns {'tweet_id', 'posted_at', 'similarity'} or None
+    def find(self, account_name, text):
+        if not self.window_days:
+            return None
+        normalized = normalize_tweet_text(text)
+        since = time.time() - self.window_days * 24 * 60 * 60
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT tweet_id, posted_at FROM posted_content WHERE account = ? AND content_hash = ? AND posted_at >= ? LIMIT 1",
+                               (account_name, self.content_hash(normalized), since)).fetchone()
+            if row:
+                return {'tweet_id': row[0], 'posted_at': row[1], 'similarity': 1.0}
+            
+            signature = minhash_signature(normalized)
+            candidates = {}
+            for band, bucket in enumerate(minhash_buckets(signature)):
+                for content_id, stored, tweet_id, posted_at in conn.execute("""
+                    SELECT c.id, c.signature, c.tweet_id, c.posted_at FROM posted_buckets b
+                    JOIN posted_content c ON c.id = b.content_id
+                    WHERE b.account = ? AND b.band = ? AND b.bucket = ? AND c.posted_at >= ?
+                """, (account_name, band, bucket, since)):
+                    candidates[content_id] = (stored, tweet_id, posted_at)
+        
+        best = None
+        for stored, tweet_id, posted_at in candidates.values():
+            similarity = minhash_similarity(signature, array.array('Q', stored))
+            if similarity >= self.threshold and (best is None or similarity > best['similarity']):
+                best = {'tweet_id': tweet_id, 'posted_at': posted_at, 'similarity': similarity}
+        return best
+    
+    # Record posted content
+    def add(self, account_name, text, tweet_id=None):
+        normalized = normalize_tweet_text(text)
+        signature = minhash_signature(normalized)
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = conn.execute("INSERT INTO posted_content (account, content_hash, signature, tweet_id, posted_at) VALUES (?, ?, ?, ?, ?)",
+                                      (account_name, self.content_hash(normalized), signature.tobytes(), tweet_id, time.time()))
+                conn.executemany("INSERT INTO posted_buckets (account, band, bucket, content_id) VALUES (?, ?, ?, ?)",
+                                 [(account_name, band, bucket, cursor.lastrowid) for band, bucket in enumerate(minhash_buckets(signature))])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+    
+    # Forget content older than the window, returns the number of entries removed
+    def prune(self):
+        since = time.time() - self.window_days * 24 * 60 * 60
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM posted_buckets WHERE content_id IN (SELECT id FROM posted_content WHERE posted_at < ?)", (since,))
+                removed = conn.execute("DELETE FROM posted_content WHERE posted_at < ?", (since,)).rowcount
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return removed
+    
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+duplicate_index = DuplicateIndex()
+
+# Function to build post tweet_index of an account from its content item: its final text (None if it can't fit) and its media files
+def compose_post(account, item, tweet_index):
+    media_paths = media_paths_for(account, tweet_index, item)
+    
+    # Mentions for this post come ready-made from the rotation table, unless the row names its own
+    if item.mentions is None:
+        influencer_tags, tags_length = account.mentions.mentions_for(tweet_index)
+    else:
+        influencer_tags, tags_length = row_mentions(item.mentions)
+    
+    # Fit the tweet into Twitter's weighted 280-character limit before any upload work
+    return compose_tweet(item.text, influencer_tags, tags_length), media_paths
+
+# Function to post a single tweet (duplicates_skipped counts the rows this slot already skipped as duplicates)
+def post_tweet(account=None, duplicates_skipped=0):
+    account = account or default_account
+    
+    # Get the tweet list (cached, so the file is only reopened after it changes)
+    reloading = account.current_tweet_index == 0 or account.current_tweet_index >= account.total_tweets
+    with metrics.span("load_tweets"):
+        content = load_content(account.tweets_file)
+    if not content:
+        log_message("⚠️ No tweets found in the tweet list or reached the end. Stopping.")
+        return False
+    account.total_tweets = len(content)
+    if reloading:
+        log_message(f"📊 Loaded {account.total_tweets} tweets from '{account.tweets_file}'.")
+    
+    attempt_id = None
+    try:
+        # Only the row being posted is read from the tweet list
+        try:
+            try:
+                item = content.item(account.current_tweet_index % account.total_tweets)
+            except ContentChangedError:
+                # The file was edited after it was loaded above: read the row from the new version
+                content = load_content(account.tweets_file)
+                if not content:
+                    return False
+                account.total_tweets = len(content)
+                item = content.item(account.current_tweet_index % account.total_tweets)
+        except ContentChangedError as e:
+            # Still changing while it's being written: the row is fine, try it again at the next slot
+            log_message(f"⏳ Tweet {account.current_tweet_index+1} can't be read right now: {e}. It will be tried again at the next slot.")
+            return False
+        except ContentError as e:
+            log_message(f"❌ Tweet {account.current_tweet_index+1} can't be used: {e}. Skipping this tweet.")
+            attempt_id = post_journal.begin(account.name, account.current_tweet_index)
+            post_journal.finish(account.name, attempt_id, 'failed', account.current_tweet_index + 1, error=str(e))
+            account.current_tweet_index += 1
+            return False
+        
+        # Tweets with an earliest post time keep their place in the list until they are due
+        if item.not_before and item.not_before > time.time():
+            due = datetime.fromtimestamp(item.not_before, timezone.utc)
+            log_message(f"⏳ Tweet {account.current_tweet_index+1} is not due before {due:%Y-%m-%d %H:%M} UTC. It will be tried again at the next slot.")
+            return False
+        
+        with metrics.span("compose_mentions"):
+            final_tweet, media_paths = compose_post(account, item, account.current_tweet_index)
+
+        # Record the attempt before any network work, so a crash can be resumed safely
+        attempt_id = post_journal.begin(account.name, account.current_tweet_index)
+        
+        if final_tweet is None:
+            log_message(f"❌ Tweet {account.current_tweet_index+1} doesn't fit into {TWEET_MAX_LENGTH} characters with its mentions. Skipping this tweet.")
+            post_journal.finish(account.name, attempt_id, 'failed', account.current_tweet_index + 1, error="tweet too long")
+            account.current_tweet_index += 1
+            return False
+        
+        # Media a row names itself may be missing or not fit into one tweet
+        media_problem = check_media_group(media_paths)
+        missing = [media_path for media_path in media_paths if not os.path.isfile(media_path)]
+        if media_problem or missing:
+            media_problem = media_problem or f"{missing[0]} not found"
+            log_message(f"❌ Tweet {account.current_tweet_index+1} can't be posted: {media_problem}. Skipping this tweet.")
+            post_journal.finish(account.name, attempt_id, 'failed', account.current_tweet_index + 1, error=media_problem)
+            account.current_tweet_index += 1
+            return False
+        
+        # Twitter rejects repeated content with a 403, so recently posted content is skipped before any upload
+        duplicate = duplicate_index.find(account.name, final_tweet)
+        if duplicate:
+            days_ago = (time.time() - duplicate['posted_at']) / (24 * 60 * 60)
+            log_message(f"⚠️ Tweet {account.current_tweet_index+1} repeats tweet {duplicate['tweet_id']} posted {days_ago:.1f} days ago ({duplicate['similarity']:.0%} similar). Skipping this tweet.")
+            post_journal.finish(account.name, attempt_id, 'failed', account.current_tweet_index + 1, error="duplicate content")
+            account.current_tweet_index += 1
+            
+            # Skipping a duplicate costs no API call, so the slot goes to the next row instead of staying silent
+            if duplicates_skipped + 1 < DUPLICATE_SKIP_LIMIT:
+                return post_tweet(account, duplicates_skipped + 1)
+            log_message(f"⚠️ {DUPLICATE_SKIP_LIMIT} tweets in a row repeat recent posts. Trying again at the next slot.")
+            return False
+        
+        # Upload media (all files of the tweet at once)
+        log_message(f"🔄 Preparing to post tweet {account.current_tweet_index+1}/{account.total_tweets}")
+        with metrics.span("upload_media"):
+            media_ids = upload_media_group(media_paths, account)
+        
+        if not media_ids:
+            log_message("❌ Failed to upload media. Skipping this tweet.")
+            post_journal.finish(account.name, attempt_id, 'failed', account.current_tweet_index + 1, error="media upload failed")
+            account.current_tweet_index += 1
+            return False
+        
+        # Post tweet with media
+        post_journal.update(attempt_id, 'posting', media_id=",".join(media_ids))
+        response = post_tweet_v2(final_tweet, media_ids, account)
+        
+        if not response:
+            log_message("❌ Failed to post tweet. Skipping to next tweet.")
+            post_journal.finish(account.name, attempt_id, 'failed', account.current_tweet_index + 1, error="create tweet failed")
+            account.current_tweet_index += 1
+            return False
+        
+        tweet_id = response.get('data', {}).get('id')
+        post_journal.finish(account.name, attempt_id, 'posted', account.current_tweet_index + 1, tweet_id=tweet_id)
+        attempt_id = None
+        try:
+            duplicate_index.add(account.name, final_tweet, tweet_id)
+        except Exception as e:
+            log_message(f"❌ Could not update the duplicate index: {e}")
+        
+        if tweet_id:
+            log_message(f"✅ Tweet {account.current_tweet_index+1}/{account.total_tweets} posted: {final_tweet}")
+            log_message(f"🔗 Tweet Link: https://twitter.com/user/status/{tweet_id}")
+        else:
+            log_message(f"⚠️ Tweet posted but couldn't get tweet ID. Response: {response}")
+        
+        # Increment tweet index
+        account.current_tweet_index += 1
+        
+        # Check if we've reached the end of the tweet list
+        if account.current_tweet_index >= account.total_tweets:
+            log_message("🎉 Reached the end of the tweet list! Will check for updates tomorrow.")
+            
+        return True
+
+    except Exception as e:
+        if isinstance(e, RateLimitError):
+            log_message(f"⏳ {str(e)}. Tweet {account.current_tweet_index+1} will be tried again at the next slot.")
+        else:
+            log_message(f"❌ Unexpected error while posting tweet: {str(e)}")
+        
+        # Close the attempt; the same tweet is tried again at the next slot (this includes rate limits)
+        if attempt_id is not None:
+            try:
+                post_journal.finish(account.name, attempt_id, 'failed', account.current_tweet_index, error=str(e))
+            except Exception as journal_error:
+                log_message(f"❌ Could not update the posting journal: {journal_error}")
+        
+        # Try to provide more detailed diagnostics
+        if "403" in str(e):
+            log_message("🔍 403 Forbidden Error Diagnostics:")
+            log_message("  - This usually indicates an authentication or permission issue")
+            log_message("  - Possible causes:")
+            log_message("    1. Invalid or expired API keys/tokens")
+            log_message("    2. Your app may not have Write permissions enabled")
+            log_message("    3. You might be trying to post duplicate content")
+            log_message("    4. Your account may have posting restrictions")
+            log_message("  - Troubleshooting steps:")
+            log_message("    1. Verify your API keys in the .env file")
+            log_message("    2. Check your Twitter Developer Portal to ensure Write permissions are enabled")
+            log_message("    3. Try posting with different content")
+            
+            # Try to verify API credentials
+            try:
+                log_message("🔄 Attempting to verify API credentials...")
+                url = f"{TWITTER_API_BASE}/2/users/me"
+                headers = get_oauth_headers("GET", url, signer=account.signer)
+                response = api_client.get(url, headers=headers)
+                
+                if response.status_code == 200:
+                    user_data = response.json().get('data', {})
+                    log_message(f"✅ API connection successful. Authenticated as: @{user_data.get('username')}")
+                    log_message("❗ This suggests the issue is with the content or posting permissions, not the API keys")
+                else:
+                    log_message(f"❌ API verification failed: {response.status_code} - {response.text}")
+                    log_message("❗ This suggests your API keys may be invalid or expired")
+            except Exception as verify_error:
+                log_message(f"❌ API verification failed: {str(verify_error)}")
+                log_message("❗ This suggests your API keys may be invalid or expired")
+        
+        return False
+
+# Worker pool shared by all accounts (created on first use)
+_post_executor = None
+_post_executor_lock = threading.Lock()
+
+# Function to run one account's post on the shared worker pool, tagged with the account's log prefix
+def run_account_post(account):
+    with account.lock, metrics.span("post_tweet"):
+        posted = run_with_log_prefix(account.log_prefix, post_tweet, account)
+    metrics.inc("tweets_posted" if posted else "tweets_failed")
+    
+    # Get the media of the next posts uploaded while there is plenty of time before their slots
+    media_stager.stage(account)
+    return posted
+
+# Function to hand a due post to the worker pool, so the scheduler never waits on a post
+def submit_post(account):
+    global _post_executor
+    with _post_executor_lock:
+        if _post_executor is None:
+            _post_executor = ThreadPoolExecutor(max_workers=ACCOUNT_WORKERS, thread_name_prefix="post")
+    return _post_executor.submit(run_account_post, account)
+
+# Optimal posting times in UTC for USA audiences
+optimal_times = [
+    "13:30", "14:30",  # Morning in Eastern US (9:30-10:30 AM ET)
+    "17:00", "18:00",  # Lunch time in Eastern US (1-2 PM ET)
+    "23:00", "00:00",  # Evening in Eastern US (7-8 PM ET)
+    "02:00", "03:00",  # Evening in Pacific US (7-8 PM PT)
+    "19:30", "04:30"   # Additional times covering multiple US time zones
+]
+
+# Select posting times based on a posts-per-day setting
+def select_post_times(posts_per_day):
+    if posts_per_day < 4:
+        return optimal_times[:4]  # Minimum 4 posts
+    elif posts_per_day > 10:
+        return optimal_times[:10]  # Maximum 10 posts
+    else:
+        return optimal_times[:posts_per_day]
+
+# Longest single sleep of the scheduler; it re-checks the wall clock at least this often,
+# so a system clock change or a suspended machine cannot delay a post by more than this
+SCHEDULER_MAX_SLEEP = 3600  # seconds
+
+# Event-driven scheduler: keeps a heap of the next UTC fire time of every daily slot and
+# sleeps until the earliest one is due, instead of waking up every minute to poll
+class PostScheduler:
+    # clock returns the current UTC epoch time; wait(timeout) blocks until woken up or timed out
+    # (both can be replaced with a fake clock to test the scheduler without real sleeping);
+    # log reports jobs that raised (log_message unless given)
+    def __init__(self, clock=time.time, wait=None, log=None):
+        self._clock = clock
+        self._wakeup = threading.Event()
+        self._wait = wait or self._wakeup.wait
+        self._log = log
+        self._heap = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._jitter = {'count': 0, 'last': 0.0, 'max': 0.0, 'total': 0.0}
+    
+    # Next UTC timestamp at which a slot (seconds after midnight UTC) is due, strictly after now
+    def _next_fire(self, slot_offset, now):
+        fire_time = now - now % 86400 + slot_offset
+        if fire_time <= now:
+            fire_time += 86400
+        return fire_time
+    
+    # Schedule job every day at time_str ("HH:MM", UTC)
+    def add_daily(self, time_str, job):
+        hours, minutes = time_str.split(':')
+        slot_offset = int(hours) * 3600 + int(minutes) * 60
+        with self._lock:
+            heapq.heappush(self._heap, (self._next_fire(slot_offset, self._clock()), next(self._sequence), slot_offset, job))
+        self.reload()
+    
+    # Remove every scheduled job
+    def clear(self):
+        with self._lock:
+            self._heap.clear()
+        self.reload()
+    
+    # Wake the scheduler up so it re-reads the heap (after jobs were added or removed)
+    def reload(self):
+        self._wakeup.set()
+    
+    # Stop run() at its next wake-up (which happens immediately)
+    def stop(self):
+        self._stopping = True
+        self._wakeup.set()
+    
+    # Seconds until the next job is due (None if nothing is scheduled)
+    def seconds_until_next(self):
+        with self._lock:
+            if not self._heap:
+                return None
+            return max(self._heap[0][0] - self._clock(), 0)
+    
+    # Run every job that is due and put it back on the heap for its next day
+    def run_pending(self):
+        while True:
+            with self._lock:
+                now = self._clock()
+                if not self._heap or self._heap[0][0] > now:
+                    return
+                fire_time, _, slot_offset, job = heapq.heappop(self._heap)
+                heapq.heappush(self._heap, (self._next_fire(slot_offset, now), next(self._sequence), slot_offset, job))
+            
+            # Track how late the job fired compared to its slot
+            jitter = now - fire_time
+            self._jitter['count'] += 1
+            self._jitter['last'] = jitter
+            self._jitter['max'] = max(self._jitter['max'], jitter)
+            self._jitter['total'] += jitter
+            metrics.observe("scheduler_jitter", jitter)
+            
+            try:
+                job()
+            except Exception as e:
+                (self._log or log_message)(f"❌ Scheduled job failed: {e}")
+    
+    # Firing jitter (seconds between a slot's time and the moment its job started)
+    def jitter_stats(self):
+        count = self._jitter['count']
+        return {
+            'count': count,
+            'last': self._jitter['last'],
+            'max': self._jitter['max'],
+            'mean': self._jitter['total'] / count if count else 0.0
+        }
+    
+    # Run jobs as they come due until stop() is called
+    def run(self):
+        self._stopping = False
+        while not self._stopping:
+            # Clear before looking at the heap, so a reload() from another thread is never missed
+            self._wakeup.clear()
+            self.run_pending()
+            
+            delay = self.seconds_until_next()
+            if delay is None or delay > SCHEDULER_MAX_SLEEP:
+                delay = SCHEDULER_MAX_SLEEP
+            if delay > 0 and not self._stopping:
+                self._wait(delay)
+
+post_scheduler = PostScheduler()
+
+# Schedule posts at each account's posting times
+def schedule_posts(accounts):
+    # Clear any existing jobs
+    post_scheduler.clear()
+    
+    # Schedule each post using UTC times; due posts run on the shared worker pool
+    for account in accounts:
+        for time_str in account.post_times:
+            post_scheduler.add_daily(time_str, functools.partial(submit_post, account))
+            log_message(f"{account.log_prefix}📅 Scheduled post at {time_str} UTC")
+        
+        log_message(f"{account.log_prefix}🔄 Set up {len(account.post_times)} posts per day")
+
+# Function to verify Twitter API credentials
+def verify_twitter_credentials(account=None):
+    account = account or default_account
+    log_message(f"🔄 Verifying Twitter API credentials...")
+    try:
+        url = f"{TWITTER_API_BASE}/2/users/me"
+        headers = get_oauth_headers("GET", url, signer=account.signer)
+        response = api_client.get(url, headers=headers)
+        
+        if response.status_code == 200:
+            user_data = response.json().get('data', {})
+            log_message(f"✅ Twitter API credentials verified! Authenticated as: @{user_data.get('username')}")
+            return True
+        else:
+            log_message(f"❌ Twitter API credential verification failed: {response.status_code} - {response.text}")
+            log_message("⚠️ Please check your API keys in the .env file")
+            return False
+            
+    except Exception as e:
+        log_message(f"❌ Twitter API credential verification failed: {str(e)}")
+        log_message("⚠️ Please check your API keys in the .env file")
+        log_message("⚠️ Common issues:")
+        log_message("  1. Incorrect API keys or tokens")
+        log_message("  2. Expired credentials")
+        log_message("  3. App not properly set up in Twitter Developer Portal")
+        return False
+
+# Function to check an account and load its media and tweets, returns False if it cannot post
+def prepare_account(account):
+    # Verify Twitter API credentials before proceeding
+    if not verify_twitter_credentials(account):
+        log_message("⚠️ Twitter API credential verification failed. Please fix the issues before continuing.")
+        log_message("👉 See the README.md file for troubleshooting the 403 Forbidden error.")
+        return False
+    
+    # Check the media folder (the list itself stays live while the bot runs)
+    if not load_media_files(account.media_folder):
+        return False
+    
+    # Convert media that needs it in the background now, rather than when its post comes up
+    for media in account.media:
+        media_preprocessor.prepare(media.path)
+    
+    # Initial tweet loading
+    content = load_content(account.tweets_file)
+    if not content:
+        log_message("⚠️ No tweets found in the tweet list. Please add tweets and restart.")
+        return False
+    
+    account.total_tweets = len(content)
+    log_message(f"📊 Loaded {account.total_tweets} tweets from '{account.tweets_file}'")
+    log_message(f"🏷️ {len(account.influencers)} influencers, {account.mentions.per_post} mentions per tweet ({account.mentions.period} mention sets)")
+    
+    # Continue where the last run stopped
+    account.current_tweet_index = post_journal.resume(account.name)
+    if account.current_tweet_index:
+        log_message(f"⏩ Resuming at tweet {account.current_tweet_index % account.total_tweets + 1}/{account.total_tweets}")
+    return True
+
+# Number of problems of each kind listed by the dry run (all of them are counted)
+DRY_RUN_MAX_LISTED = 20
+
+# Function to check a media file without uploading it, returns a problem description or None
+def check_media_file(media_path):
+    try:
+        size = os.path.getsize(media_path)
+    except OSError as e:
+        return f"can't read {media_path}: {e.strerror}"
+    if size == 0:
+        return f"{media_path} is empty"
+    media_type = media_type_of(media_path)
+    if media_type is None:
+        return f"{media_path} is not a supported image or video"
+    if media_type.startswith('video'):
+        limit = MAX_VIDEO_BYTES
+        duration = video_duration(media_path)
+        if duration and duration > MAX_VIDEO_SECONDS:
+            return f"{media_path} is {duration:.0f}s long (limit {MAX_VIDEO_SECONDS}s)"
+    else:
+        limit = MAX_GIF_BYTES if media_type == 'image/gif' else MAX_IMAGE_BYTES
+    if size > limit and not (media_preprocessor.needs_conversion(media_path) and media_preprocessor.can_convert(media_path)):
+        return f"{media_path} is {size / (1024 * 1024):.1f}MB (limit {limit // (1024 * 1024)}MB)"
+    return None
+
+# Function to check every post of an account's tweet list without touching the network:
+# composes each tweet exactly as post_tweet would, pairs it with its media and collects all problems
+# Returns (number of tweets, errors, warnings); errors and warnings are lists of (row, message)
+def validate_account_posts(account):
+    errors = []
+    warnings = []
+    
+    content = load_content(account.tweets_file)
+    if not content:
+        errors.append((None, f"no tweets found in '{account.tweets_file}'"))
+        return 0, errors, warnings
+    tweet_count = len(content)
+    
+    if not load_media_files(account.media_folder):
+        errors.append((None, f"not enough media files in '{account.media_folder}'"))
+        return tweet_count, errors, warnings
+    
+    # Each media file is checked once, however many tweets use it
+    media_problems = {}
+    
+    # Repeats are found the way DuplicateIndex finds them when posting: normalized text for exact
+    # repeats, MinHash buckets of (band, bucket) -> [(row, signature)] for near-duplicates
+    first_seen = {}
+    seen_buckets = {}
+    for index in range(tweet_count):
+        # Row of the tweet as the user sees it in the file
+        row = content.row_number(index)
+        try:
+            item = content.item(index)
+        except ContentError as e:
+            errors.append((row, str(e)))
+            continue
+        final_tweet, media_paths = compose_post(account, item, index)
+        text = item.text
+        
+        if final_tweet is None:
+            errors.append((row, f"doesn't fit into {TWEET_MAX_LENGTH} characters with its mentions"))
+        elif not final_tweet.startswith(text):
+            warnings.append((row, f"will be truncated ({tweet_length(text)} characters)"))
+        
+        # Repeated text is usually a copy-paste mistake, and Twitter rejects exact repeats
+        normalized = normalize_tweet_text(final_tweet or text)
+        if normalized in first_seen:
+            errors.append((row, f"duplicate of row {first_seen[normalized]}"))
+        else:
+            first_seen[normalized] = row
+            signature = minhash_signature(normalized)
+            buckets = list(enumerate(minhash_buckets(signature)))
+            similar_row, similarity = None, 0
+            for key in buckets:
+                for other_row, other in seen_buckets.get(key, ()):
+                    other_similarity = minhash_similarity(signature, other)
+                    if other_similarity > similarity:
+                        similar_row, similarity = other_row, other_similarity
+            if similarity >= NEAR_DUPLICATE_THRESHOLD:
+                warnings.append((row, f"{similarity:.0%} similar to row {similar_row}; skipped if posted within {DUPLICATE_WINDOW_DAYS} days of it"))
+            for key in buckets:
+                seen_buckets.setdefault(key, []).append((row, signature))
+        
+        for media_path in media_paths:
+            if media_path not in media_problems:
+                media_problems[media_path] = check_media_file(media_path)
+            if media_problems[media_path]:
+                errors.append((row, media_problems[media_path]))
+        media_problem = check_media_group(media_paths)
+        if media_problem:
+            errors.append((row, media_problem))
+    
+    return tweet_count, errors, warnings
+
+# Function to run the dry run for all accounts and print a report, returns True if no errors were found
+def dry_run(accounts):
+    started = time.perf_counter()
+    total_errors = 0
+    for account in accounts:
+        tweet_count, errors, warnings = validate_account_posts(account)
+        total_errors += len(errors)
+        print(f"🔍 {account.log_prefix}{account.tweets_file}: {tweet_count} tweets, {len(errors)} errors, {len(warnings)} warnings")
+        for icon, problems in (("❌", errors), ("⚠️", warnings)):
+            for row, message in problems[:DRY_RUN_MAX_LISTED]:
+                print(f"  {icon} Row {row}: {message}" if row else f"  {icon} {message}")
+            if len(problems) > DRY_RUN_MAX_LISTED:
+                print(f"  … and {len(problems) - DRY_RUN_MAX_LISTED} more")
+    print(f"⏱️ Dry run finished in {time.perf_counter() - started:.2f}s")
+    return total_errors == 0
+
+# Function to compile a tweet list into a COMPILED_CONTENT_EXTENSION file next to it (or at output_path),
+# returns the output path or None if the list has rows that can't be used
+def compile_content(source_path, output_path=None):
+    output_path = output_path or os.path.splitext(source_path)[0] + COMPILED_CONTENT_EXTENSION
+    started = time.perf_counter()
+    try:
+        source = open_content_source(source_path)
+    except (ContentError, OSError) as e:
+        log_message(f"⚠️ ERROR: '{source_path}': {e}")
+        return None
+    
+    try:
+        count = len(source)
+        offsets = array.array('Q', [0])
+        problems = []
+        
+        # The blob is written behind the space reserved for the offsets, which are filled in at the end
+        temp_path = output_path + ".tmp"
+        with open(temp_path, 'wb') as file:
+            file.seek(COMPILED_CONTENT_HEADER.size + (count + 1) * 8)
+            size = 0
+            for position in range(count):
+                try:
+                    item = source.item(position)
+                except ContentError as e:
+                    problems.append(f"row {source.row_number(position)}: {e}")
+                    continue
+                if COMPILED_METADATA_SEPARATOR in item.text:
+                    problems.append(f"row {source.row_number(position)}: the text contains a \\x1f control character")
+                    continue
+                
+                record = item.text
+                metadata = {key: value for key, value in (('media', item.media), ('mentions', item.mentions), ('not_before', item.not_before))
+                            if value is not None}
+                if metadata:
+                    record += COMPILED_METADATA_SEPARATOR + json.dumps(metadata, ensure_ascii=False)
+                data = record.encode('utf-8')
+                file.write(data)
+                size += len(data)
+                offsets.append(size)
+            
+            if not problems:
+                file.seek(0)
+                file.write(COMPILED_CONTENT_HEADER.pack(COMPILED_CONTENT_MAGIC, sys.byteorder[0].encode(), count))
+                file.write(offsets.tobytes())
+        
+        # Rows are addressed by position, so a list with unusable rows isn't compiled at all
+        if problems:
+            os.remove(temp_path)
+            log_message(f"❌ '{source_path}' has {len(problems)} rows that can't be used, nothing was compiled:")
+            for problem in problems[:DRY_RUN_MAX_LISTED]:
+                log_message(f"  {problem}")
+            return None
+        os.replace(temp_path, output_path)
+    finally:
+        source.close()
+    
+    log_message(f"📦 Compiled {count} tweets from '{source_path}' into '{output_path}' ({os.path.getsize(output_path) / (1024 * 1024):.1f}MB) in {time.perf_counter() - started:.1f}s")
+    return output_path
+
+# Main execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Auto Tweet Bot (Twitter API v2)")
+    parser.add_argument('--dry-run', action='store_true', help="check every tweet, its mentions and media without posting, then exit")
+    parser.add_argument('--compile', metavar='TWEET_LIST', help=f"compile a tweet list into a memory-mapped {COMPILED_CONTENT_EXTENSION} file next to it, then exit")
+    args = parser.parse_args()
+    
+    load_config()
+    
+    if args.compile:
+        # A one-shot local command, nothing goes to Telegram
+        TELEGRAM_BOT_TOKEN = None
+        exit(0 if compile_content(args.compile) else 1)
+    
+    if args.dry_run:
+        # Nothing may touch the network, so log lines stay off Telegram too
+        TELEGRAM_BOT_TOKEN = None
+        exit(0 if dry_run(load_accounts()) else 1)
+    
+    log_message("🚀 Auto Tweet Bot Started (Twitter API v2)")
+    
+    # Timing metrics are only collected when they are served or dumped
+    metrics.enabled = bool(METRICS_PORT or METRICS_JSON_FILE)
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+        log_message(f"📈 Metrics available at http://127.0.0.1:{METRICS_PORT}/metrics")
+    log_message(f"⚙️ Configuration: {POSTS_PER_DAY} posts per day")
+    
+    # Install required packages if not already installed
+    try:
+        import requests_toolbelt
+    except ImportError:
+        log_message("📦 Installing required package: requests-toolbelt")
+        import subprocess
+        subprocess.check_call(["pip", "install", "requests-toolbelt"])
+        log_message("✅ Package installed successfully")
+        import requests_toolbelt
+    
+    # Keep the posting journal small
+    removed = post_journal.compact()
+    if removed:
+        log_message(f"🧹 Compacted posting journal ({removed} old entries removed)")
+    removed = duplicate_index.prune()
+    if removed:
+        log_message(f"🧹 Pruned duplicate index ({removed} entries older than {DUPLICATE_WINDOW_DAYS} days removed)")
+    removed = media_preprocessor.prune(media_cache.content_hashes())
+    if removed:
+        log_message(f"🧹 Removed {removed} converted media files that are no longer in the media cache")
+    
+    # Check every account before proceeding; accounts that aren't ready are left out
+    accounts = [account for account in load_accounts() if run_with_log_prefix(account.log_prefix, prepare_account, account)]
+    if not accounts:
+        exit()
+    
+    # Schedule posts
+    schedule_posts(accounts)
+    
+    # Upload the media of the first posts now rather than in their slots
+    for account in accounts:
+        media_stager.stage(account)
+    
+    # Run the scheduler
+    log_message("⏱️ Scheduler running. Press Ctrl+C to stop.")
+    
+    try:
+        # Sleeps until the next slot is due instead of polling
+        post_scheduler.run()
+    except KeyboardInterrupt:
+        log_message("👋 Auto Tweet Bot stopped by user")
+    except Exception as e:
+        log_message(f"❌ Error in main loop: {e}")
+    finally:
+        jitter = post_scheduler.jitter_stats()
+        if jitter['count']:
+            log_message(f"⏱️ Scheduler jitter over {jitter['count']} posts: mean {jitter['mean']:.3f}s, max {jitter['max']:.3f}s")
+        stats = api_client.connection_stats()
+        log_message(f"🔌 HTTP connections: {stats['opened']} opened, {stats['reused']} reused over {stats['requests']} requests")
+        post_scheduler.stop()
+        media_stager.shutdown()
+        media_preprocessor.shutdown()
+        processing_poller.stop()
+        if _post_executor is not None:
+            _post_executor.shutdown(wait=True)
+        log_message(f"♻️ Media cache: {media_cache.hits} hits, {media_cache.misses} misses")
+        if METRICS_JSON_FILE:
+            try:
+                metrics.dump(METRICS_JSON_FILE)
+                log_message(f"📈 Metrics written to {METRICS_JSON_FILE}")
+            except OSError as e:
+                log_message(f"❌ Could not write metrics to {METRICS_JSON_FILE}: {e}")
+        metrics.stop()
+        post_journal.close()
+        media_cache.close()
+        duplicate_index.close()
+        telegram_notifier.stop()
+        api_client.close()
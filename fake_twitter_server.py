@@ -0,0 +1,901 @@
+import gc
+import os
+import hmac
+import uuid
+import base64
+import hashlib
+import re
+import sys
+import csv
+import json
+import time
+import random
+import shutil
+import struct
+import subprocess
+import argparse
+import itertools
+import tempfile
+import threading
+import contextlib
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, quote, unquote
+
+# Local stand-in for the Twitter and Telegram endpoints used by autotweets_v2.py, so uploads,
+# posting and Telegram delivery can be exercised without live credentials.
+#
+#   python fake_twitter_server.py --port 8080 --latency 0.05 --error-rate 0.01
+#   TWITTER_API_BASE=http://127.0.0.1:8080 TWITTER_UPLOAD_BASE=http://127.0.0.1:8080 \
+#   TELEGRAM_API_BASE=http://127.0.0.1:8080 python autotweets_v2.py
+#
+#   python fake_twitter_server.py --bench 2000 --accounts 4
+#   python fake_twitter_server.py --bench-memory 512
+#   python fake_twitter_server.py --bench-upload 64 --latency 0.2
+#   python fake_twitter_server.py --bench-startup
+#   python fake_twitter_server.py --bench-compose 1000000
+#   python fake_twitter_server.py --bench-sign 100000
+#   python fake_twitter_server.py --bench-store 1000000
+#   python fake_twitter_server.py --bench-xlsx 100000
+
+# Default server settings
+DEFAULT_PORT = 8080
+DEFAULT_RATE_WINDOW = 15 * 60  # Seconds per rate limit window (Twitter uses 15 minutes)
+MEDIA_ID_LIFETIME = 24 * 60 * 60  # expires_after_secs reported by FINALIZE
+MAX_TWEET_LENGTH = 280  # Weighted characters, counted like Twitter does (URLs 23, CJK and emoji 2)
+MAX_MEDIA_PER_TWEET = 4
+BENCH_TWEET_ROWS = 100  # Smallest tweet list a benchmark run posts from
+MEMORY_OVERHEAD_MB = 8  # Peak RSS a --bench-memory upload may add beyond one segment buffer per upload worker
+UPLOAD_BENCH_CONCURRENCY = (1, 2, 4, 8)  # Segments in flight at each step of the --bench-upload sweep
+UPLOAD_BENCH_LATENCY = 0.2  # Seconds per response --bench-upload injects when --latency isn't given
+UPLOAD_SPEEDUP_TARGET = 2.0  # How much faster than one segment at a time MEDIA_UPLOAD_CONCURRENCY must upload
+STARTUP_BUDGET_MS = 50  # Import time of autotweets_v2 with a warm bytecode cache (best of STARTUP_RUNS)
+STARTUP_RUNS = 5
+# Modules autotweets_v2 only needs once it posts, converts media or serves metrics; importing one at startup is a regression
+LAZY_MODULES = ('requests', 'requests_toolbelt', 'openpyxl', 'PIL', 'dotenv', 'http.server', 'multiprocessing')
+COMPOSE_BUDGET_US = 100  # Mean time compose_tweet may take per --bench-compose tweet (with 10 mentions)
+# Request --bench-sign signs, and the example from Twitter's "Creating a signature" guide with the signature it must produce
+SIGN_BENCH_REQUEST = ('POST', "https://upload.twitter.com/1.1/media/upload.json", {'command': 'FINALIZE', 'media_id': '1234567890123456789'})
+SIGN_REFERENCE_KEYS = ('xvz1evFS4wEEPTGEFPHBog', 'kAcSOqF21Fu85e7zjz7ZN2U4ZRhfV3WpwPAoE3Z7kBw',
+                       '370773112-GmHxMAgYyLbNEtIKZeRNFsMKPR9EyMZeS9weJAEb', 'LswwdoUaIvS8ltyTt5jkRh4J50vUPVVHtR2YPi5kE')
+SIGN_REFERENCE_REQUEST = ('POST', "https://api.twitter.com/1.1/statuses/update.json",
+                          {'include_entities': 'true', 'status': "Hello Ladies + Gentlemen, a signed OAuth request!"})
+SIGN_REFERENCE_NONCE = 'kYjzVBB8Y0ZFabxSWbWovY3uYSQ2pTgmZeNu2VS4cg'
+SIGN_REFERENCE_TIMESTAMP = 1318622958
+SIGN_REFERENCE_SIGNATURE = 'hCtSmYh+iHYCEqBWrE7C7hYmtUk='
+STORE_OPEN_BUDGET_MS = 10  # Time opening a --bench-store .tweets file may take, whatever its size
+STORE_RSS_BUDGET_MB = 4  # Private RSS opening a --bench-store .tweets file and reading STORE_SAMPLE_READS rows may add
+STORE_SAMPLE_READS = 1000
+XLSX_LOADERS = ('streaming', 'pandas')  # How --bench-xlsx loads the workbook: load_content, or pd.read_excel as autotweets.py does
+# Words the synthetic --bench-compose tweets are made of: plain words, CJK, emoji sequences (ZWJ family,
+# skin tone, flag, keycap) and URLs
+COMPOSE_PLAIN_WORDS = ("learning", "students", "classroom", "teachers", "today", "great", "ideas", "the", "and", "with", "école", "ciência")
+COMPOSE_MIXED_WORDS = ("学习", "教室の先生", "학생들", "\U0001f468\u200d\U0001f469\u200d\U0001f467", "\U0001f44d\U0001f3fd", "\U0001f1fa\U0001f1f8", "1\ufe0f\u20e3", "\u2764\ufe0f", "https://example.com/articles/learning", "www.edutopia.org", "edutopia.org/teaching")
+
+# Class holding everything the fake API knows: uploaded media, posted tweets and rate limit windows
+class FakeApiState:
+    def __init__(self, latency=0.0, error_rate=0.0, rate_limit=0, rate_window=DEFAULT_RATE_WINDOW, processing_time=0.0):
+        self.latency = latency  # Seconds added to every response
+        self.error_rate = error_rate  # Fraction of requests answered with 503
+        self.rate_limit = rate_limit  # Requests per window per endpoint (0 disables rate limits)
+        self.rate_window = rate_window
+        self.processing_time = processing_time  # Seconds a video stays 'in_progress' after FINALIZE
+        
+        self.media = {}
+        self.tweets = []
+        self.telegram_messages = []
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self._windows = {}
+        self._ids = itertools.count(1000000)
+        self._lock = threading.Lock()
+    
+    def next_id(self):
+        with self._lock:
+            return str(next(self._ids))
+    
+    # Take one request from an endpoint's window; returns (limit, remaining, reset) or None when exhausted
+    def take(self, endpoint):
+        now = time.time()
+        with self._lock:
+            window = self._windows.get(endpoint)
+            if window is None or now >= window['reset']:
+                window = {'remaining': self.rate_limit, 'reset': int(now + self.rate_window)}
+                self._windows[endpoint] = window
+            if window['remaining'] <= 0:
+                self.rate_limited += 1
+                return None
+            window['remaining'] -= 1
+            return (self.rate_limit, window['remaining'], window['reset'])
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'rate_limited': self.rate_limited,
+                'media': len(self.media),
+                'tweets': len(self.tweets),
+                'telegram_messages': len(self.telegram_messages)
+            }
+
+# Class handling one request against the shared FakeApiState
+class FakeApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+    
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def send_empty(self, status, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.end_headers()
+    
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+    
+    def do_GET(self):
+        self.handle_request('GET')
+    
+    def do_POST(self):
+        self.handle_request('POST')
+    
+    def handle_request(self, method):
+        state = self.server.state
+        parts = urlsplit(self.path)
+        body = self.read_body() if method == 'POST' else b''
+        with state._lock:
+            state.requests += 1
+        
+        if state.latency:
+            time.sleep(state.latency)
+        
+        # Telegram: /bot<token>/sendMessage
+        if re.fullmatch(r'/bot[^/]+/sendMessage', parts.path):
+            return self.telegram_send_message(body)
+        
+        if not self.headers.get('Authorization', '').startswith('OAuth '):
+            return self.send_json(401, {'title': 'Unauthorized', 'detail': 'Missing OAuth 1.0a Authorization header'})
+        
+        if state.error_rate and random.random() < state.error_rate:
+            with state._lock:
+                state.errors += 1
+            return self.send_json(503, {'title': 'Service Unavailable'})
+        
+        headers = {}
+        if state.rate_limit:
+            window = state.take((method, parts.path))
+            if window is None:
+                reset = state._windows[(method, parts.path)]['reset']
+                headers = {'x-rate-limit-limit': state.rate_limit, 'x-rate-limit-remaining': 0, 'x-rate-limit-reset': reset}
+                return self.send_json(429, {'title': 'Too Many Requests'}, headers)
+            headers = {'x-rate-limit-limit': window[0], 'x-rate-limit-remaining': window[1], 'x-rate-limit-reset': window[2]}
+        
+        if parts.path == '/1.1/media/upload.json':
+            if method == 'GET':
+                return self.media_status(parse_qs(parts.query), headers)
+            return self.media_upload(body, headers)
+        if parts.path == '/2/tweets' and method == 'POST':
+            return self.create_tweet(body, headers)
+        if parts.path == '/2/users/me' and method == 'GET':
+            return self.send_json(200, {'data': {'id': '1', 'name': 'Fake User', 'username': 'fake_user'}}, headers)
+        return self.send_json(404, {'title': 'Not Found', 'detail': f'{method} {parts.path}'})
+    
+    # INIT and FINALIZE are form posts, APPEND is multipart
+    def media_upload(self, body, headers):
+        state = self.server.state
+        if self.headers.get('Content-Type', '').startswith('multipart/form-data'):
+            match = re.search(rb'name="media_id"\r\n\r\n(\d+)', body)
+            media = state.media.get(match.group(1).decode()) if match else None
+            if media is None:
+                return self.send_json(400, {'errors': [{'message': 'Unknown media_id'}]}, headers)
+            with state._lock:
+                media['segments'] += 1
+                media['bytes'] += len(body)
+            return self.send_empty(204, headers)
+        
+        form = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+        command = form.get('command')
+        if command == 'INIT':
+            media_id = state.next_id()
+            state.media[media_id] = {
+                'type': form.get('media_type', ''),
+                'total_bytes': int(form.get('total_bytes') or 0),
+                'segments': 0,
+                'bytes': 0,
+                'finalized_at': None
+            }
+            return self.send_json(200, {'media_id': int(media_id), 'media_id_string': media_id, 'expires_after_secs': MEDIA_ID_LIFETIME}, headers)
+        
+        media = state.media.get(form.get('media_id'))
+        if command == 'FINALIZE' and media is not None:
+            if media['segments'] == 0:
+                return self.send_json(400, {'errors': [{'message': 'No segments uploaded'}]}, headers)
+            media['finalized_at'] = time.time()
+            response = {'media_id': int(form['media_id']), 'media_id_string': form['media_id'], 'size': media['total_bytes'], 'expires_after_secs': MEDIA_ID_LIFETIME}
+            if media['type'].startswith('video'):
+                response['processing_info'] = {'state': 'pending', 'check_after_secs': state.processing_time}
+            return self.send_json(200, response, headers)
+        return self.send_json(400, {'errors': [{'message': 'Bad media upload request'}]}, headers)
+    
+    def media_status(self, query, headers):
+        state = self.server.state
+        media_id = query.get('media_id', [''])[0]
+        media = state.media.get(media_id)
+        if media is None or media['finalized_at'] is None:
+            return self.send_json(400, {'errors': [{'message': 'Unknown media_id'}]}, headers)
+        
+        left = media['finalized_at'] + state.processing_time - time.time()
+        if left > 0:
+            processing_info = {'state': 'in_progress', 'check_after_secs': left, 'progress_percent': int(100 * (1 - left / state.processing_time))}
+        else:
+            processing_info = {'state': 'succeeded', 'progress_percent': 100}
+        return self.send_json(200, {'media_id': int(media_id), 'media_id_string': media_id, 'processing_info': processing_info}, headers)
+    
+    def create_tweet(self, body, headers):
+        from autotweets_v2 import tweet_length
+        
+        state = self.server.state
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            return self.send_json(400, {'title': 'Invalid Request', 'detail': 'Body is not JSON'}, headers)
+        
+        text = payload.get('text', '')
+        if not text or tweet_length(text) > MAX_TWEET_LENGTH:
+            return self.send_json(400, {'title': 'Invalid Request', 'detail': f'Tweet text must be 1-{MAX_TWEET_LENGTH} weighted characters'}, headers)
+        media_ids = payload.get('media', {}).get('media_ids', [])
+        if len(media_ids) > MAX_MEDIA_PER_TWEET:
+            return self.send_json(400, {'title': 'Invalid Request', 'detail': f'At most {MAX_MEDIA_PER_TWEET} media per tweet'}, headers)
+        for media_id in media_ids:
+            media = state.media.get(media_id)
+            if media is None or media['finalized_at'] is None:
+                return self.send_json(400, {'title': 'Invalid Request', 'detail': f'Media {media_id} is not ready'}, headers)
+            # Videos and GIFs can't be combined with other media
+            if len(media_ids) > 1 and (media['type'].startswith('video') or media['type'] == 'image/gif'):
+                return self.send_json(400, {'title': 'Invalid Request', 'detail': f'Media {media_id} must be the only media of a tweet'}, headers)
+        
+        tweet_id = state.next_id()
+        with state._lock:
+            state.tweets.append({'id': tweet_id, 'text': text, 'media_ids': payload.get('media', {}).get('media_ids', [])})
+        return self.send_json(201, {'data': {'id': tweet_id, 'text': text}}, headers)
+    
+    def telegram_send_message(self, body):
+        state = self.server.state
+        form = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+        if not form.get('text'):
+            return self.send_json(400, {'ok': False, 'error_code': 400, 'description': 'Bad Request: message text is empty'})
+        with state._lock:
+            state.telegram_messages.append(form['text'])
+        return self.send_json(200, {'ok': True, 'result': {'message_id': len(state.telegram_messages), 'text': form['text']}})
+
+# Function to start the fake API server on a background thread (port 0 picks a free port)
+def start_server(state, host="127.0.0.1", port=0, verbose=False):
+    server = ThreadingHTTPServer((host, port), FakeApiHandler)
+    server.daemon_threads = True
+    server.state = state
+    server.verbose = verbose
+    threading.Thread(target=server.serve_forever, name="fake-api", daemon=True).start()
+    return server
+
+# Function to run the fake server in a child process, so a benchmark's memory figures only cover the
+# client; returns the process and the port it listens on
+def start_server_process(state):
+    command = [sys.executable, '-u', os.path.abspath(__file__), '--port', '0', '--latency', str(state.latency),
+               '--error-rate', str(state.error_rate), '--rate-limit', str(state.rate_limit),
+               '--rate-window', str(state.rate_window), '--processing-time', str(state.processing_time)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    match = re.search(r':(\d+)\s*$', line)
+    if not match:
+        process.kill()
+        raise RuntimeError(f"Fake server didn't start: {line.strip()!r}")
+    return process, int(match.group(1))
+
+# Function to get a percentile from a sorted list of samples
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+# Function to create the tweet list and media files a benchmark run posts from
+def create_bench_content(folder, tweet_rows, media_files, media_size):
+    from openpyxl import Workbook
+    
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['Tweet'])
+    for row in range(tweet_rows):
+        sheet.append([f"Benchmark tweet {row + 1}: learning never stops."])
+    tweets_file = os.path.join(folder, "tweetlist.xlsx")
+    workbook.save(tweets_file)
+    
+    media_folder = os.path.join(folder, "media")
+    os.makedirs(media_folder)
+    for index in range(media_files):
+        with open(os.path.join(media_folder, f"bench_{index}.jpg"), 'wb') as file:
+            file.write(b'\xff\xd8\xff\xe0' + os.urandom(media_size))
+    return tweets_file, media_folder
+
+# Function to import autotweets_v2 configured to talk to the fake server at base
+def load_bot(base):
+    os.environ.update({
+        'TWITTER_API_BASE': base,
+        'TWITTER_UPLOAD_BASE': base,
+        'TELEGRAM_API_BASE': base,
+        'TWITTER_API_KEY': 'bench-key',
+        'TWITTER_API_SECRET': 'bench-secret',
+        'TWITTER_ACCESS_TOKEN': 'bench-token',
+        'TWITTER_ACCESS_SECRET': 'bench-token-secret',
+        'TELEGRAM_BOT_TOKEN': 'bench',
+        'TELEGRAM_CHAT_ID': '1'
+    })
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import autotweets_v2 as bot
+    bot.load_config()
+    return bot
+
+# Function to get the peak RSS of this process in MB (None where the resource module doesn't exist)
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return max_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+# Function to get the private RSS of this process in MB (None where /proc doesn't exist). Pages of a
+# memory-mapped file are shared page cache the kernel can drop, so only private pages are counted
+def private_rss_mb():
+    try:
+        with open('/proc/self/statm') as file:
+            _, resident, shared = (int(field) for field in file.read().split()[:3])
+        return (resident - shared) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+# Function to drive simulated posts through autotweets_v2 against the fake server and report the results
+def run_benchmark(state, posts, accounts, media_files, media_size):
+    folder = tempfile.mkdtemp(prefix="autotweets_bench_")
+    server = start_server(state)
+    base = f"http://127.0.0.1:{server.server_port}"
+    
+    # The bot keeps its state database in the working directory, so run it in a scratch folder
+    previous_folder = os.getcwd()
+    os.chdir(folder)
+    bot = load_bot(base)
+    
+    # One distinct row per post, so no post hits the duplicate check and every post takes the full upload path
+    tweets_file, media_folder = create_bench_content(folder, max(BENCH_TWEET_ROWS, posts), media_files, media_size)
+    bench_accounts = []
+    for index in range(accounts):
+        signer = bot.OAuth1Signer('bench-key', 'bench-secret', f'bench-token-{index}', 'bench-token-secret')
+        account = bot.Account(f"bench{index}", signer, tweets_file=tweets_file, media_folder=media_folder, log_prefix=f"[bench{index}] ")
+        bench_accounts.append(account)
+    
+    latencies = []
+    results = []
+    latencies_lock = threading.Lock()
+    
+    # Each account posts its share one after another, like consecutive slots
+    def post_many(account, count):
+        for _ in range(count):
+            started = time.perf_counter()
+            posted = bot.run_account_post(account)
+            elapsed = time.perf_counter() - started
+            with latencies_lock:
+                latencies.append(elapsed)
+                results.append(posted)
+    
+    shares = [posts // accounts + (1 if index < posts % accounts else 0) for index in range(accounts)]
+    print(f"🚀 Benchmark: {posts} posts across {accounts} accounts against {base}")
+    
+    tracemalloc.start()
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        with ThreadPoolExecutor(max_workers=accounts) as executor:
+            for future in [executor.submit(post_many, account, count) for account, count in zip(bench_accounts, shares)]:
+                future.result()
+        elapsed = time.perf_counter() - started
+        _, peak_traced = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        bot.media_stager.shutdown()
+        bot.processing_poller.stop()
+        bot.post_journal.close()
+        bot.media_cache.close()
+        bot.duplicate_index.close()
+        bot.telegram_notifier.stop()
+        connection_stats = bot.api_client.connection_stats()
+        bot.api_client.close()
+    server.shutdown()
+    
+    latencies.sort()
+    print(f"✅ Posted {sum(1 for posted in results if posted)}/{posts} in {elapsed:.2f}s ({posts / elapsed:.1f} posts/s)")
+    print(f"⏱️ Post latency: p50 {percentile(latencies, 0.50) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+    print(f"🧠 Peak traced Python memory: {peak_traced / (1024 * 1024):.1f} MB")
+    if peak_rss_mb() is not None:
+        print(f"🧠 Peak RSS: {peak_rss_mb():.1f} MB")
+    print(f"🔌 Connections: {connection_stats}")
+    print(f"📊 Server: {state.stats()}")
+    
+    os.chdir(previous_folder)
+    shutil.rmtree(folder, ignore_errors=True)
+
+# Function to upload one large synthetic video through autotweets_v2's streaming upload and check
+# that the peak RSS it adds stays within budget_mb, however large the file is (the fake server runs
+# in the same process, so the budget covers the segments in flight on both sides)
+# Function to write an MP4 header followed by random data; written block by block so creating it costs no memory
+def write_bench_video(media_path, size_mb):
+    with open(media_path, 'wb') as file:
+        file.write(struct.pack('>I4s4sI', 16, b'ftyp', b'isom', 0))
+        block = os.urandom(1024 * 1024)
+        for _ in range(size_mb):
+            file.write(block)
+
+def run_memory_benchmark(state, size_mb, budget_mb=None):
+    folder = tempfile.mkdtemp(prefix="autotweets_membench_")
+    # The server buffers every segment it receives; in this process that would count against the upload
+    server, port = start_server_process(state)
+    bot = load_bot(f"http://127.0.0.1:{port}")
+    if budget_mb is None:
+        # One segment buffer per upload worker is all the upload should hold
+        budget_mb = bot.MEDIA_SEGMENT_SIZE * bot.MEDIA_UPLOAD_CONCURRENCY / (1024 * 1024) + MEMORY_OVERHEAD_MB
+    
+    media_path = os.path.join(folder, "bench.mp4")
+    write_bench_video(media_path, size_mb)
+    
+    # The HTTP libraries are imported before the baseline, so it only measures the upload itself
+    import requests
+    import requests_toolbelt
+    signer = bot.OAuth1Signer('bench-key', 'bench-secret', 'bench-token', 'bench-token-secret')
+    account = bot.Account("membench", signer, media_folder=folder)
+    baseline = peak_rss_mb()
+    if baseline is None:
+        print("⚠️ Peak RSS can't be measured on this platform")
+    
+    print(f"🚀 Memory benchmark: uploading {size_mb} MB in {bot.MEDIA_SEGMENT_SIZE // (1024 * 1024)} MB segments ({bot.MEDIA_UPLOAD_CONCURRENCY} at a time)")
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        upload = bot.start_media_upload(media_path, account)
+        result = upload.result() if upload is not None else None
+        bot.processing_poller.stop()
+        bot.telegram_notifier.stop()
+        bot.api_client.close()
+    elapsed = time.perf_counter() - started
+    server.terminate()
+    server.wait()
+    shutil.rmtree(folder, ignore_errors=True)
+    
+    if not result:
+        print("❌ Upload failed")
+        return False
+    print(f"✅ Uploaded {size_mb} MB in {elapsed:.2f}s ({size_mb / elapsed:.0f} MB/s)")
+    if baseline is None:
+        return True
+    added = peak_rss_mb() - baseline
+    print(f"🧠 Peak RSS added by the upload: {added:.1f} MB (budget {budget_mb:.0f} MB)")
+    if added > budget_mb:
+        print("❌ Over budget")
+        return False
+    return True
+
+# Function to upload one video at each concurrency level against the fake server's injected latency;
+# fails unless MEDIA_UPLOAD_CONCURRENCY beats one segment at a time by UPLOAD_SPEEDUP_TARGET
+def run_upload_benchmark(state, size_mb, levels=UPLOAD_BENCH_CONCURRENCY):
+    folder = tempfile.mkdtemp(prefix="autotweets_uploadbench_")
+    server = start_server(state)
+    bot = load_bot(f"http://127.0.0.1:{server.server_port}")
+    media_path = os.path.join(folder, "bench.mp4")
+    write_bench_video(media_path, size_mb)
+    signer = bot.OAuth1Signer('bench-key', 'bench-secret', 'bench-token', 'bench-token-secret')
+    account = bot.Account("uploadbench", signer, media_folder=folder)
+    default_concurrency = bot.MEDIA_UPLOAD_CONCURRENCY
+    segments = -(-size_mb * 1024 * 1024 // bot.MEDIA_SEGMENT_SIZE)
+    
+    print(f"🚀 Upload benchmark: {size_mb} MB in {segments} segments of {bot.MEDIA_SEGMENT_SIZE // (1024 * 1024)} MB, {state.latency * 1000:.0f} ms per response")
+    timings = {}
+    for concurrency in sorted(set(levels) | {1, default_concurrency}):
+        bot.MEDIA_UPLOAD_CONCURRENCY = concurrency
+        started = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            upload = bot.start_media_upload(media_path, account)
+            result = upload.result() if upload is not None else None
+        elapsed = time.perf_counter() - started
+        if not result:
+            print(f"❌ Upload failed at concurrency {concurrency}")
+            break
+        timings[concurrency] = elapsed
+        print(f"  concurrency {concurrency:>2}: {elapsed:6.2f}s ({size_mb / elapsed:6.1f} MB/s, {timings[1] / elapsed:.1f}x)")
+    
+    bot.MEDIA_UPLOAD_CONCURRENCY = default_concurrency
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        bot.processing_poller.stop()
+        bot.telegram_notifier.stop()
+        bot.api_client.close()
+    server.shutdown()
+    shutil.rmtree(folder, ignore_errors=True)
+    
+    if default_concurrency not in timings:
+        return False
+    speedup = timings[1] / timings[default_concurrency]
+    print(f"📈 MEDIA_UPLOAD_CONCURRENCY={default_concurrency} uploads {speedup:.1f}x faster than one segment at a time (target {UPLOAD_SPEEDUP_TARGET:.1f}x)")
+    if speedup < UPLOAD_SPEEDUP_TARGET:
+        print("❌ Below target")
+        return False
+    return True
+
+# Function to import a module in fresh interpreters; returns the best cumulative import time in ms and the modules it pulled in
+def measure_import(module, runs):
+    env = dict(os.environ)
+    # Measure with a bytecode cache, as a deployed bot starts; the first run writes it
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    folder = os.path.dirname(os.path.abspath(__file__))
+    best = None
+    imported = set()
+    for run in range(runs + 1):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"], cwd=folder, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed: {result.stderr.strip().splitlines()[-1]}")
+        
+        imported = set()
+        elapsed = None
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line.split("|")
+            imported.add(name.strip())
+            if name.strip() == module and cumulative.strip().isdigit():
+                elapsed = int(cumulative) / 1000
+        if run > 0 and elapsed is not None:
+            best = elapsed if best is None else min(best, elapsed)
+    return best, imported
+
+# Function to check that autotweets_v2 imports within its budget and leaves heavy modules for later
+def run_startup_benchmark(budget_ms, runs=STARTUP_RUNS):
+    print(f"🚀 Startup benchmark: best of {runs} imports with python -X importtime")
+    v1_ms, _ = measure_import("autotweets", runs)
+    v2_ms, imported = measure_import("autotweets_v2", runs)
+    print(f"⏱️ autotweets: {v1_ms:.1f}ms (reference)")
+    print(f"⏱️ autotweets_v2: {v2_ms:.1f}ms (budget {budget_ms}ms)")
+    
+    passed = True
+    eager = sorted(name for name in imported if any(name == lazy or name.startswith(lazy + '.') for lazy in LAZY_MODULES))
+    if eager:
+        print(f"❌ Imported at startup: {', '.join(eager)}")
+        passed = False
+    if v2_ms > budget_ms:
+        print("❌ Over budget")
+        passed = False
+    return passed
+
+# Function to build one synthetic tweet of 5-45 words; a quarter of them mix in CJK, emoji and URLs
+def synthetic_tweet(rng):
+    words = COMPOSE_PLAIN_WORDS + COMPOSE_MIXED_WORDS if rng.random() < 0.25 else COMPOSE_PLAIN_WORDS
+    return " ".join(rng.choice(words) for _ in range(rng.randint(5, 45)))
+
+# Function to time tweet_length and compose_tweet on synthetic tweets and check every composed tweet fits
+def run_compose_benchmark(count, budget_us):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import autotweets_v2 as bot
+    
+    rng = random.Random(18)
+    tweets = [synthetic_tweet(rng) for _ in range(count)]
+    mentions = " ".join(f"@{handle}" for handle in bot.influencers[:10])
+    mentions_length = bot.tweet_length(mentions)
+    print(f"🚀 Compose benchmark: {count} synthetic tweets, {len(mentions.split())} mentions ({mentions_length} weighted characters)")
+    
+    started = time.perf_counter()
+    for text in tweets:
+        bot.tweet_length(text)
+    length_seconds = time.perf_counter() - started
+    print(f"⏱️ tweet_length: {length_seconds:.2f}s ({length_seconds / count * 1e6:.1f}us per tweet)")
+    
+    started = time.perf_counter()
+    composed = [bot.compose_tweet(text, mentions, mentions_length) for text in tweets]
+    compose_seconds = time.perf_counter() - started
+    print(f"⏱️ compose_tweet: {compose_seconds:.2f}s ({compose_seconds / count * 1e6:.1f}us per tweet, budget {budget_us}us)")
+    
+    # Every tweet must fit, and a truncated one must keep a prefix of its content
+    truncated = 0
+    broken = []
+    for text, tweet in zip(tweets, composed):
+        if tweet is None or bot.tweet_length(tweet) > bot.TWEET_MAX_LENGTH:
+            broken.append(text)
+            continue
+        content = tweet[:-len(mentions)].rstrip("\n")
+        if content != text:
+            truncated += 1
+            if not content.endswith(bot.TWEET_TRUNCATION_SUFFIX) or not text.startswith(content[:-len(bot.TWEET_TRUNCATION_SUFFIX)]):
+                broken.append(text)
+    print(f"✂️ Truncated {truncated} of {count} tweets ({truncated / count:.0%})")
+    
+    passed = True
+    if broken:
+        print(f"❌ {len(broken)} tweets were composed wrong, e.g. {broken[0]!r}")
+        passed = False
+    if compose_seconds / count * 1e6 > budget_us:
+        print("❌ Over budget")
+        passed = False
+    return passed
+
+# Function to sign a request the way get_oauth_headers did before OAuth1Signer: every parameter, the
+# signing key and the header are built from scratch on each call, with the same RFC 3986 encoding as
+# oauth_quote (kept only as the --bench-sign baseline)
+def inline_oauth_header(keys, method, url, params=None):
+    consumer_key, consumer_secret, access_token, access_secret = keys
+    oauth_params = {
+        'oauth_consumer_key': consumer_key,
+        'oauth_nonce': uuid.uuid4().hex,
+        'oauth_signature_method': 'HMAC-SHA1',
+        'oauth_timestamp': str(int(time.time())),
+        'oauth_token': access_token,
+        'oauth_version': '1.0'
+    }
+    all_params = dict(oauth_params)
+    if params:
+        all_params.update(params)
+    
+    base_string_params = '&'.join([f"{quote(k, safe='~')}={quote(str(all_params[k]), safe='~')}" for k in sorted(all_params.keys())])
+    base_string = f"{method}&{quote(url, safe='~')}&{quote(base_string_params, safe='~')}"
+    signing_key = f"{quote(consumer_secret, safe='~')}&{quote(access_secret, safe='~')}"
+    signature = base64.b64encode(hmac.new(signing_key.encode(), base_string.encode(), hashlib.sha1).digest()).decode()
+    
+    oauth_params['oauth_signature'] = signature
+    return 'OAuth ' + ', '.join([f'{quote(k, safe="~")}="{quote(v, safe="~")}"' for k, v in sorted(oauth_params.items())])
+
+# Function to check OAuth1Signer against Twitter's reference signature, then compare its signatures
+# per second with signing every request from scratch
+def run_sign_benchmark(count):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import autotweets_v2 as bot
+    from unittest import mock
+    
+    # The reference signature needs the guide's nonce and timestamp
+    reference = bot.OAuth1Signer(*SIGN_REFERENCE_KEYS)
+    with mock.patch.object(bot.uuid, 'uuid4', return_value=mock.Mock(hex=SIGN_REFERENCE_NONCE)), \
+         mock.patch.object(bot.time, 'time', return_value=SIGN_REFERENCE_TIMESTAMP):
+        header = reference.sign(*SIGN_REFERENCE_REQUEST)
+    signature = unquote(re.search(r'oauth_signature="([^"]*)"', header).group(1))
+    if signature != SIGN_REFERENCE_SIGNATURE:
+        print(f"❌ OAuth1Signer produced {signature} for Twitter's reference request, expected {SIGN_REFERENCE_SIGNATURE}")
+        return False
+    print(f"✅ OAuth1Signer matches Twitter's reference signature ({SIGN_REFERENCE_SIGNATURE})")
+    
+    method, url, params = SIGN_BENCH_REQUEST
+    keys = ('bench-key', 'bench-secret', 'bench-token', 'bench-token-secret')
+    signer = bot.OAuth1Signer(*keys)
+    print(f"🚀 Signing benchmark: {count} signatures of {method} {url}")
+    
+    started = time.perf_counter()
+    for _ in range(count):
+        inline_oauth_header(keys, method, url, params)
+    inline_seconds = time.perf_counter() - started
+    print(f"⏱️ Signing from scratch: {count / inline_seconds:,.0f} signatures/s ({inline_seconds / count * 1e6:.1f}us each)")
+    
+    started = time.perf_counter()
+    for _ in range(count):
+        signer.sign(method, url, params)
+    signer_seconds = time.perf_counter() - started
+    print(f"⏱️ OAuth1Signer: {count / signer_seconds:,.0f} signatures/s ({signer_seconds / count * 1e6:.1f}us each, {inline_seconds / signer_seconds:.1f}x)")
+    
+    if signer_seconds > inline_seconds:
+        print("❌ OAuth1Signer is slower than signing from scratch")
+        return False
+    return True
+
+# Function to open a tweet list and read some of its rows; returns the source, the rows read,
+# the open time in seconds, the time per read in seconds and the RSS added in MB
+def measure_content_source(bot, path, positions):
+    gc.collect()
+    rss_before = private_rss_mb()
+    started = time.perf_counter()
+    source = bot.open_content_source(path)
+    open_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    items = [source.item(position) for position in positions]
+    read_seconds = (time.perf_counter() - started) / len(positions)
+    added = private_rss_mb() - rss_before if rss_before is not None else None
+    return source, items, open_seconds, read_seconds, added
+
+# Function to compile a synthetic CSV tweet list to .tweets and compare opening and reading both
+def run_store_benchmark(rows, open_budget_ms, rss_budget_mb):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import autotweets_v2 as bot
+    
+    folder = tempfile.mkdtemp(prefix="autotweets_storebench_")
+    csv_path = os.path.join(folder, "tweets.csv")
+    rng = random.Random(24)
+    with open(csv_path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['Tweet', 'Media', 'Mentions'])
+        for row in range(rows):
+            # Some rows carry media and mentions, so the compiled file has metadata records too
+            writer.writerow([synthetic_tweet(rng), "a.jpg;b.jpg" if row % 7 == 0 else "", "@Edutopia @ISTE" if row % 5 == 0 else ""])
+    print(f"🚀 Store benchmark: {rows} rows, CSV {os.path.getsize(csv_path) / (1024 * 1024):.1f}MB")
+    
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        compiled_path = bot.compile_content(csv_path)
+    if compiled_path is None:
+        print("❌ Compiling failed")
+        shutil.rmtree(folder, ignore_errors=True)
+        return False
+    print(f"🗜️ Compiled in {time.perf_counter() - started:.1f}s: {os.path.getsize(compiled_path) / (1024 * 1024):.1f}MB")
+    
+    positions = [rng.randrange(rows) for _ in range(STORE_SAMPLE_READS)]
+    results = {}
+    for name, path in (("tweets", compiled_path), ("csv", csv_path)):
+        source, items, open_seconds, read_seconds, added = measure_content_source(bot, path, positions)
+        source.close()
+        results[name] = ([(item.text, item.media, item.mentions, item.not_before) for item in items], open_seconds, added)
+        rss = f"+{added:.1f}MB private RSS" if added is not None else "RSS not measured"
+        print(f"⏱️ .{name}: opened in {open_seconds * 1000:.1f}ms, {read_seconds * 1e6:.1f}us per read, {rss} after {len(positions)} reads")
+    shutil.rmtree(folder, ignore_errors=True)
+    
+    passed = True
+    items, open_seconds, added = results["tweets"]
+    if items != results["csv"][0]:
+        print("❌ The compiled list returns different rows than the CSV it was compiled from")
+        passed = False
+    if open_seconds * 1000 > open_budget_ms:
+        print(f"❌ Opening the .tweets file took over {open_budget_ms}ms")
+        passed = False
+    if added is not None and added > rss_budget_mb:
+        print(f"❌ The .tweets file added over {rss_budget_mb}MB private RSS")
+        passed = False
+    return passed
+
+# Function to load a workbook's tweets with one of XLSX_LOADERS; returns import and load time in seconds,
+# the peak RSS the load added in MB and a digest of the tweets. Run in a fresh interpreter per loader,
+# so neither one's peak hides the other's
+def measure_xlsx_loader(loader, path):
+    started = time.perf_counter()
+    if loader == 'pandas':
+        import pandas as pd
+    else:
+        import autotweets_v2 as bot
+        import openpyxl
+    import_seconds = time.perf_counter() - started
+    gc.collect()
+    baseline = peak_rss_mb()
+    
+    started = time.perf_counter()
+    if loader == 'pandas':
+        texts = []
+        for tweet in pd.read_excel(path)['Tweet']:
+            if pd.isna(tweet) or tweet == "":
+                break
+            texts.append(str(tweet))
+    else:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            source = bot.load_content(path)
+        texts = [source.item(position).text for position in range(len(source))]
+    load_seconds = time.perf_counter() - started
+    
+    result = {
+        'import_seconds': import_seconds,
+        'load_seconds': load_seconds,
+        'peak_mb': peak_rss_mb() - baseline if baseline is not None else None,
+        'rows': len(texts),
+        'digest': hashlib.sha1("\n".join(texts).encode()).hexdigest()
+    }
+    if loader != 'pandas':
+        # A second load of an unchanged file is answered from the cache
+        started = time.perf_counter()
+        bot.load_content(path)
+        result['reload_seconds'] = time.perf_counter() - started
+    return result
+
+# Function to compare loading a ROWS-row workbook with load_content (streamed by openpyxl) and with pandas;
+# fails if they return different tweets or the streaming loader's peak memory isn't the lower one
+def run_xlsx_benchmark(rows):
+    from openpyxl import Workbook
+    
+    folder = tempfile.mkdtemp(prefix="autotweets_xlsxbench_")
+    path = os.path.join(folder, "tweetlist.xlsx")
+    rng = random.Random(6)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(['Tweet', 'Media', 'Mentions'])
+    for row in range(rows):
+        sheet.append([synthetic_tweet(rng), "a.jpg;b.jpg" if row % 7 == 0 else None, "@Edutopia @ISTE" if row % 5 == 0 else None])
+    workbook.save(path)
+    print(f"🚀 XLSX benchmark: {rows} rows, workbook {os.path.getsize(path) / (1024 * 1024):.1f}MB")
+    
+    results = {}
+    script = "import sys, json\nimport fake_twitter_server as bench\nprint(json.dumps(bench.measure_xlsx_loader(sys.argv[1], sys.argv[2])))"
+    for loader in XLSX_LOADERS:
+        process = subprocess.run([sys.executable, '-c', script, loader, path], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+        if process.returncode != 0:
+            print(f"❌ The {loader} loader failed: {process.stderr.strip().splitlines()[-1]}")
+            shutil.rmtree(folder, ignore_errors=True)
+            return False
+        result = results[loader] = json.loads(process.stdout.strip().splitlines()[-1])
+        peak = f"+{result['peak_mb']:.1f}MB peak RSS" if result['peak_mb'] is not None else "peak RSS not measured"
+        reload = f", cached reload {result['reload_seconds'] * 1e6:.0f}us" if 'reload_seconds' in result else ""
+        print(f"⏱️ {loader}: {result['rows']} tweets in {result['load_seconds']:.2f}s (import {result['import_seconds']:.2f}s), {peak}{reload}")
+    shutil.rmtree(folder, ignore_errors=True)
+    
+    passed = True
+    streaming, pandas_result = results['streaming'], results['pandas']
+    if (streaming['rows'], streaming['digest']) != (pandas_result['rows'], pandas_result['digest']):
+        print("❌ The streaming loader returns different tweets than pandas")
+        passed = False
+    if streaming['peak_mb'] is not None and streaming['peak_mb'] >= pandas_result['peak_mb']:
+        print("❌ The streaming loader's peak RSS isn't below pandas'")
+        passed = False
+    return passed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Twitter/Telegram API server for autotweets_v2.py")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of Twitter requests answered with 503")
+    parser.add_argument('--rate-limit', type=int, default=0, help="requests per window per endpoint (0 = unlimited)")
+    parser.add_argument('--rate-window', type=int, default=DEFAULT_RATE_WINDOW, help="seconds per rate limit window")
+    parser.add_argument('--processing-time', type=float, default=0.0, help="seconds videos stay in processing")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    parser.add_argument('--bench', type=int, metavar="POSTS", help="run a benchmark of POSTS posts instead of serving")
+    parser.add_argument('--accounts', type=int, default=4, help="accounts posting concurrently in the benchmark")
+    parser.add_argument('--media-files', type=int, default=8, help="distinct media files in the benchmark")
+    parser.add_argument('--media-size', type=int, default=256 * 1024, help="bytes per benchmark media file")
+    parser.add_argument('--bench-memory', type=int, metavar="MB", help="upload one MB-sized video and check the peak RSS it adds")
+    parser.add_argument('--memory-budget', type=float, help="peak RSS in MB the --bench-memory upload may add (default: MEDIA_SEGMENT_SIZE x MEDIA_UPLOAD_CONCURRENCY + 8 MB)")
+    parser.add_argument('--bench-upload', type=int, metavar="MB", help="time uploading one MB-sized video at each segment concurrency")
+    parser.add_argument('--bench-startup', action='store_true', help="check how long autotweets_v2 takes to import")
+    parser.add_argument('--startup-budget', type=float, default=STARTUP_BUDGET_MS, help="import time in ms --bench-startup allows")
+    parser.add_argument('--bench-compose', type=int, metavar="TWEETS", help="time tweet length counting and composing on TWEETS synthetic tweets")
+    parser.add_argument('--compose-budget', type=float, default=COMPOSE_BUDGET_US, help="mean microseconds per tweet --bench-compose allows")
+    parser.add_argument('--bench-sign', type=int, metavar="SIGNATURES", help="check OAuth1Signer against Twitter's reference signature and time SIGNATURES signatures")
+    parser.add_argument('--bench-store', type=int, metavar="ROWS", help="compile a ROWS-row tweet list and compare opening it with the CSV")
+    parser.add_argument('--store-open-budget', type=float, default=STORE_OPEN_BUDGET_MS, help="ms --bench-store allows for opening the .tweets file")
+    parser.add_argument('--store-rss-budget', type=float, default=STORE_RSS_BUDGET_MB, help="private RSS in MB --bench-store allows the .tweets file to add")
+    parser.add_argument('--bench-xlsx', type=int, metavar="ROWS", help="compare loading a ROWS-row workbook with load_content and with pandas")
+    args = parser.parse_args()
+    
+    state = FakeApiState(args.latency, args.error_rate, args.rate_limit, args.rate_window, args.processing_time)
+    if args.bench:
+        run_benchmark(state, args.bench, args.accounts, args.media_files, args.media_size)
+    elif args.bench_memory:
+        sys.exit(0 if run_memory_benchmark(state, args.bench_memory, args.memory_budget) else 1)
+    elif args.bench_upload:
+        state.latency = state.latency or UPLOAD_BENCH_LATENCY
+        sys.exit(0 if run_upload_benchmark(state, args.bench_upload) else 1)
+    elif args.bench_startup:
+        sys.exit(0 if run_startup_benchmark(args.startup_budget) else 1)
+    elif args.bench_compose:
+        sys.exit(0 if run_compose_benchmark(args.bench_compose, args.compose_budget) else 1)
+    elif args.bench_sign:
+        sys.exit(0 if run_sign_benchmark(args.bench_sign) else 1)
+    elif args.bench_store:
+        sys.exit(0 if run_store_benchmark(args.bench_store, args.store_open_budget, args.store_rss_budget) else 1)
+    elif args.bench_xlsx:
+        sys.exit(0 if run_xlsx_benchmark(args.bench_xlsx) else 1)
+    else:
+        server = start_server(state, args.host, args.port, args.verbose)
+        print(f"🚀 Fake Twitter/Telegram API listening on http://{args.host}:{server.server_port}")
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            print(f"📊 {state.stats()}")
+            server.shutdown()
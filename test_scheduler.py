@@ -0,0 +1,97 @@
+import unittest
+from unittest import mock
+
+import autotweets
+import autotweets_v2 as bot
+
+# Fake-clock tests of PostScheduler: wait() moves the clock forward instead of sleeping,
+# so days of scheduling run in milliseconds
+#
+#   python -m unittest        (or python -m pytest)
+
+START = 1704067200  # 2024-01-01 00:00 UTC
+DAYS = 3
+
+# Scheduler on a fake clock that records every job it fires and every wait
+class FakeClockScheduler:
+    def __init__(self, days=DAYS):
+        self.now = START
+        self.end = START + days * 86400
+        self.fired = []
+        self.waits = []
+        self.scheduler = bot.PostScheduler(clock=lambda: self.now, wait=self.wait)
+    
+    def wait(self, timeout):
+        self.waits.append(timeout)
+        self.now += timeout
+        if self.now >= self.end:
+            self.scheduler.stop()
+    
+    def job(self, slot):
+        return lambda: self.fired.append((slot, self.now))
+
+# Function to get the UTC timestamp of an "HH:MM" slot on a day after START
+def slot_time(day, slot):
+    hours, minutes = slot.split(':')
+    return START + day * 86400 + int(hours) * 3600 + int(minutes) * 60
+
+class PostSchedulerTest(unittest.TestCase):
+    def test_fires_every_slot_at_its_exact_time(self):
+        fake = FakeClockScheduler()
+        for slot in ("21:45", "09:00", "13:30"):
+            fake.scheduler.add_daily(slot, fake.job(slot))
+        fake.scheduler.run()
+        
+        expected = [(slot, slot_time(day, slot)) for day in range(DAYS) for slot in ("09:00", "13:30", "21:45")]
+        self.assertEqual(fake.fired, expected)
+        self.assertEqual(fake.scheduler.jitter_stats()['max'], 0)
+    
+    def test_slot_added_by_a_job_fires_the_same_day(self):
+        fake = FakeClockScheduler(days=1)
+        
+        def add_later_slot():
+            fake.fired.append(("09:00", fake.now))
+            if fake.now == slot_time(0, "09:00"):
+                fake.scheduler.add_daily("10:00", fake.job("10:00"))
+        
+        fake.scheduler.add_daily("09:00", add_later_slot)
+        fake.scheduler.run()
+        self.assertEqual(fake.fired, [("09:00", slot_time(0, "09:00")), ("10:00", slot_time(0, "10:00"))])
+    
+    def test_sleeps_until_the_next_slot_instead_of_polling(self):
+        fake = FakeClockScheduler()
+        fake.scheduler.add_daily("09:00", fake.job("09:00"))
+        fake.scheduler.run()
+        
+        # One wait per fired job, plus one per SCHEDULER_MAX_SLEEP cap (a 60 s poll would wait 4320 times)
+        self.assertLessEqual(len(fake.waits), len(fake.fired) + DAYS * 86400 // bot.SCHEDULER_MAX_SLEEP + 1)
+        self.assertTrue(all(timeout > 0 for timeout in fake.waits))
+    
+    def test_failed_job_is_logged_and_the_next_one_still_runs(self):
+        fake = FakeClockScheduler(days=1)
+        logged = []
+        fake.scheduler = bot.PostScheduler(clock=lambda: fake.now, wait=fake.wait, log=logged.append)
+        fake.scheduler.add_daily("09:00", lambda: 1 / 0)
+        fake.scheduler.add_daily("10:00", fake.job("10:00"))
+        fake.scheduler.run()
+        
+        self.assertEqual(len(logged), 1)
+        self.assertEqual(fake.fired, [("10:00", slot_time(0, "10:00"))])
+    
+    def test_jitter_is_recorded_in_metrics(self):
+        metrics = bot.Metrics()
+        metrics.enabled = True
+        fake = FakeClockScheduler(days=1)
+        fake.scheduler.add_daily("09:00", fake.job("09:00"))
+        with mock.patch.object(bot, 'metrics', metrics):
+            fake.scheduler.run()
+        
+        jitter = metrics.snapshot()['spans']['scheduler_jitter']
+        self.assertEqual(jitter['count'], 1)
+        self.assertEqual(jitter['sum_seconds'], 0)
+    
+    def test_original_script_uses_the_same_scheduler(self):
+        self.assertIsInstance(autotweets.post_scheduler, bot.PostScheduler)
+
+if __name__ == "__main__":
+    unittest.main()